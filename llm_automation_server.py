@@ -14,6 +14,8 @@ HTTP endpoints (default: http://127.0.0.1:5015/):
       -> { "status": "ok" }
   - GET  /api/search/broad?pattern=...&maxResults=...
       -> [ { kind, name, fullName, moduleName, assemblyPath, signature }, ... ]
+  - POST /api/search/broad/batch  with { "patterns": [...], "maxResults": ... }
+      -> [ { "pattern": ..., "hits": [ ...same shape as broad... ] }, ... ]
   - GET  /api/lookup/clear?identifier=...
       -> { status: "ok" | "ambiguous" | "not_found", ... }
   - GET  /api/search/typeRefs?identifier=...&maxResults=...
@@ -23,16 +25,262 @@ This mirrors the .NET-based design but avoids extra build/restore
 complexity by running as a standalone Python script.
 """
 
+import bisect
+import functools
+import itertools
 import json
 import os
 import re
+import shutil
 import sys
 import tempfile
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any, Dict, List, Tuple
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+try:
+    # Optional linear-time regex engine (google-re2 binding). Its API is a
+    # drop-in for `re`, so broad_search transparently gets a DFA scan that
+    # cannot blow up on pathological backtracking patterns.
+    import re2  # type: ignore
+except ImportError:
+    re2 = None
+
+try:
+    # Optional SIMD JSON parser; parses bytes directly, which matters for
+    # the multi-hundred-MB project dumps piped in at startup.
+    import orjson  # type: ignore
+
+    _loads = orjson.loads
+
+    def _dumps(payload: Any) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(payload: Any) -> bytes:
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+try:
+    # Optional multi-pattern matcher (pyahocorasick); lets
+    # find_type_references test all target tokens against a string in one
+    # pass instead of one `in` scan per token.
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Optional incremental JSON parser; lets startup ingest stream modules
+    # out of stdin one at a time instead of holding the raw bytes and the
+    # fully-parsed tree in memory simultaneously.
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None
+
+# Reject absurd query strings before any parsing work happens.
+MAX_QUERY_LEN = 8192
 
 PROJECT: Dict[str, Any] = {}
 
+class ModuleRec:
+    """One module's pre-resolved search fields (slotted to keep the index
+    a fraction of the size of the equivalent dict tree)."""
+
+    __slots__ = ("name", "assembly_full", "assembly_path", "hay_lower")
+
+    def __init__(self, name: str, assembly_full: str, assembly_path: str, hay_lower: str):
+        self.name = name
+        self.assembly_full = assembly_full
+        self.assembly_path = assembly_path
+        self.hay_lower = hay_lower
+
+
+class TypeRec:
+    __slots__ = (
+        "name",
+        "full_name",
+        "name_lower",
+        "full_lower",
+        "base_type",
+        "base_lower",
+        "source_path",
+        "module_name",
+        "assembly_path",
+        "hay_lower",
+        "members",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        full_name: str,
+        base_type: str,
+        source_path: str,
+        module_name: str,
+        assembly_path: str,
+    ):
+        self.name = name
+        self.full_name = full_name
+        self.name_lower = name.lower()
+        self.full_lower = full_name.lower()
+        self.base_type = base_type
+        self.base_lower = base_type.lower()
+        self.source_path = source_path
+        self.module_name = module_name
+        self.assembly_path = assembly_path
+        self.hay_lower = self.full_lower + "\n" + self.name_lower
+        self.members: List["MemberRec"] = []
+
+
+class MemberRec:
+    __slots__ = (
+        "name",
+        "full_name",
+        "full_lower",
+        "signature",
+        "sig_lower",
+        "member_type",
+        "owner_type_idx",
+        "hay_lower",
+    )
+
+    def __init__(self, name: str, full_name: str, signature: str, member_type: str, owner_type_idx: int):
+        self.name = name
+        self.full_name = full_name
+        self.full_lower = full_name.lower()
+        self.signature = signature
+        self.sig_lower = signature.lower()
+        self.member_type = member_type
+        self.owner_type_idx = owner_type_idx
+        self.hay_lower = (full_name + "\n" + name + "\n" + signature).lower()
+
+
+# Flat search index built once at startup by _build_search_index().
+# PROJECT is never mutated after read_initial_project_from_stdin(), so
+# the index never needs invalidation. Keeping the records flat (one list
+# entry per module/type/member, with module fields pre-resolved) lets the
+# query endpoints iterate a single contiguous list instead of re-walking
+# the nested JSON tree on every request.
+MODULE_RECORDS: List[ModuleRec] = []
+TYPE_RECORDS: List[TypeRec] = []
+TYPE_FULLNAMES_LOWER: List[str] = []
+MEMBER_RECORDS: List[MemberRec] = []
+EXACT_FULLNAME_INDEX: Dict[str, List[int]] = {}
+LOWER_FULLNAME_INDEX: Dict[str, List[int]] = {}
+
+# Per record kind: (blob, offsets) where blob is every record's lowered
+# haystack joined with '\n' and offsets[i] is record i's start position.
+# Lets the literal prescreen run as C-level str.find jumps over one big
+# string instead of a Python-level loop over every record.
+HAY_BLOBS: Dict[str, Any] = {}
+
+_QUANTIFIER_CHARS = frozenset("*+?{")
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_literal(pattern: str) -> "str | None":
+    """
+    Extract the longest literal alphanumeric run a regex match must contain.
+
+    Any string matching the pattern is guaranteed to contain the returned
+    substring (case-insensitively), so it can be used as a cheap
+    `in`-prescreen before running the full regex. Returns None when no
+    safe literal can be determined (alternation, escapes-only patterns,
+    everything optional, ...).
+    """
+    best = ""
+    cur = ""
+    class_depth = 0
+    paren_depth = 0
+    i = 0
+    n = len(pattern)
+
+    def flush() -> None:
+        nonlocal best, cur
+        if len(cur) > len(best):
+            best = cur
+        cur = ""
+
+    while i < n:
+        ch = pattern[i]
+        if ch == "\\":
+            # Escape sequences (\d, \., ...) end the current literal run.
+            flush()
+            i += 2
+            continue
+        if class_depth:
+            if ch == "]":
+                class_depth -= 1
+            i += 1
+            continue
+        if ch == "[":
+            flush()
+            class_depth += 1
+            i += 1
+            continue
+        if ch == "{":
+            # Quantifier body {m,n}: the digits are repeat counts, not
+            # required text, so skip to the matching '}' like the class
+            # handling above. An unmatched '{' is literal in `re`, and so
+            # are the characters after it; fall through for those.
+            end = pattern.find("}", i + 1)
+            flush()
+            if end != -1:
+                i = end + 1
+                continue
+            i += 1
+            continue
+        if ch == "(":
+            # Group contents may be optional or alternated; skip them.
+            flush()
+            paren_depth += 1
+            i += 1
+            continue
+        if ch == ")":
+            paren_depth = max(0, paren_depth - 1)
+            i += 1
+            continue
+        if paren_depth:
+            i += 1
+            continue
+        if ch == "|":
+            # Top-level alternation: no single literal is required.
+            return None
+        if ch.isalnum() or ch == "_":
+            if i + 1 < n and pattern[i + 1] in _QUANTIFIER_CHARS:
+                # A quantified char may match zero times (or be part of a
+                # repeat); it cannot extend a required run.
+                flush()
+            else:
+                cur += ch
+            i += 1
+            continue
+        flush()
+        i += 1
+
+    flush()
+    return best or None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(pattern: str) -> "re.Pattern[str]":
+    """Compile (and cache) a case-insensitive search pattern.
+
+    LLM agents tend to repeat the same handful of patterns, so caching the
+    compiled regex avoids paying re.compile on every HTTP request.
+
+    Prefers RE2 when installed; RE2 rejects constructs it cannot run in
+    linear time (backreferences, lookarounds), in which case we fall back
+    to the stdlib backtracking engine.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern, re.IGNORECASE)
+        except Exception:
+            pass
+    return re.compile(pattern, re.IGNORECASE)
+
 
 def log(msg: str) -> None:
     try:
@@ -57,20 +305,39 @@ def read_initial_project_from_stdin() -> None:
     if stdin.isatty():
         log("stdin is a TTY, no project JSON provided; starting with empty project.")
         PROJECT = {"Modules": []}
+        _build_search_index()
+        return
+
+    if ijson is not None:
+        # Stream modules straight off the pipe; peak memory stays at one
+        # module instead of raw-bytes + full tree.
+        try:
+            modules = _stream_modules(stdin)
+        except Exception as ex:
+            log(f"failed to stream JSON from stdin: {ex!r}")
+            modules = []
+        PROJECT = {"Modules": modules}
+        _build_search_index()
+        # The slotted index fully replaces the parsed JSON tree; drop the
+        # tree so the GC can reclaim the (much larger) dict graph.
+        PROJECT = {"Modules": []}
         return
 
     raw_bytes = stdin.read()
     if not raw_bytes.strip():
         log("stdin is empty/whitespace; starting with empty project.")
         PROJECT = {"Modules": []}
+        _build_search_index()
         return
 
     try:
-        text = raw_bytes.decode("utf-8", errors="replace")
-        obj = json.loads(text)
+        # Both orjson and stdlib json accept UTF-8 bytes directly, so skip
+        # the explicit decode (and its full-copy) entirely.
+        obj = _loads(raw_bytes)
     except Exception as ex:
         log(f"failed to parse JSON from stdin: {ex!r}")
         PROJECT = {"Modules": []}
+        _build_search_index()
         return
 
     if isinstance(obj, dict) and "Modules" in obj:
@@ -81,139 +348,291 @@ def read_initial_project_from_stdin() -> None:
         log("unrecognized JSON shape, expected root.Modules or root.Project.Modules; starting with empty project.")
         PROJECT = {"Modules": []}
 
+    _build_search_index()
+    # The slotted index fully replaces the parsed JSON tree; drop the tree
+    # so the GC can reclaim the (much larger) dict graph.
+    PROJECT = {"Modules": []}
+
+
+def _stream_modules(f: Any) -> List[Dict[str, Any]]:
+    """
+    Incrementally pull module dicts out of a JSON stream.
+
+    Accepts the same two shapes as the buffered path (root.Modules and
+    root.Project.Modules) in a single pass, which matters because stdin
+    cannot be rewound to retry with a different prefix.
+    """
+    from ijson.common import ObjectBuilder
+
+    target_prefixes = ("Modules.item", "Project.Modules.item")
+    modules: List[Dict[str, Any]] = []
+    builder = None
+    item_prefix = ""
+
+    for prefix, event, value in ijson.parse(f):
+        if builder is None:
+            if event == "start_map" and prefix in target_prefixes:
+                builder = ObjectBuilder()
+                builder.event(event, value)
+                item_prefix = prefix
+        else:
+            builder.event(event, value)
+            if event == "end_map" and prefix == item_prefix:
+                modules.append(builder.value)
+                builder = None
+
+    return modules
+
+
+def _resolve_assembly_path(mod: Dict[str, Any]) -> str:
+    return (
+        (mod.get("AssemblyPath") or "").strip()
+        or (mod.get("ModuleFilePath") or "").strip()
+        or (mod.get("FileName") or "").strip()
+    )
+
+
+def _build_module_index(mod: Dict[str, Any]):
+    """
+    Build the flat records for a single module.
+
+    Member ownerTypeIdx values are module-local here; _build_search_index
+    rebases them when it merges the per-module results.
+    """
+    mod_name = (mod.get("Name") or "").strip()
+    assembly_full = (mod.get("AssemblyFullName") or "").strip()
+    assembly_path = _resolve_assembly_path(mod)
+
+    # The lowered concatenation of every searchable field doubles as the
+    # haystack for the literal-substring prescreen.
+    module_rec = ModuleRec(
+        mod_name, assembly_full, assembly_path, (mod_name + "\n" + assembly_full).lower()
+    )
+
+    type_recs: List[TypeRec] = []
+    member_recs: List[MemberRec] = []
+
+    for t in mod.get("Types") or []:
+        rec = TypeRec(
+            (t.get("Name") or "").strip(),
+            (t.get("FullName") or "").strip(),
+            (t.get("BaseType") or "").strip(),
+            (t.get("SourceFilePath") or "").strip(),
+            mod_name,
+            assembly_path,
+        )
+        idx = len(type_recs)
+        type_recs.append(rec)
+
+        for m in _iter_members(t):
+            m_rec = MemberRec(
+                (m.get("Name") or "").strip(),
+                (m.get("FullName") or "").strip(),
+                (m.get("Signature") or "").strip(),
+                (m.get("MemberType") or "").strip(),
+                idx,
+            )
+            member_recs.append(m_rec)
+            rec.members.append(m_rec)
+
+    return module_rec, type_recs, member_recs
+
+
+def _build_search_index() -> None:
+    """
+    Build the flat search index from PROJECT.
+
+    Per-module record building is farmed out to a thread pool (the hot
+    work — strip/lower/concat on big strings — happens in C, so threads
+    overlap usefully; a process pool would spend more time pickling each
+    module dict than the precompute costs). The merge stays sequential:
+    it rebases member owner indices and fills the full-name indices.
+    """
+    MODULE_RECORDS.clear()
+    TYPE_RECORDS.clear()
+    TYPE_FULLNAMES_LOWER.clear()
+    MEMBER_RECORDS.clear()
+    EXACT_FULLNAME_INDEX.clear()
+    LOWER_FULLNAME_INDEX.clear()
+
+    # Memoized query results are only valid for the index they were
+    # computed against.
+    broad_search.cache_clear()
+    clear_lookup.cache_clear()
+    find_type_references.cache_clear()
 
-def _iter_types() -> Tuple[Dict[str, Any], Dict[str, Any]]:
     modules = PROJECT.get("Modules") or []
-    for mod in modules:
-        types = mod.get("Types") or []
-        for t in types:
-            yield mod, t
+    if len(modules) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(modules), os.cpu_count() or 1)) as ex:
+            per_module = list(ex.map(_build_module_index, modules))
+    else:
+        per_module = [_build_module_index(mod) for mod in modules]
+
+    for module_rec, type_recs, member_recs in per_module:
+        offset = len(TYPE_RECORDS)
+        MODULE_RECORDS.append(module_rec)
+
+        for rec in type_recs:
+            idx = len(TYPE_RECORDS)
+            TYPE_RECORDS.append(rec)
+            TYPE_FULLNAMES_LOWER.append(rec.full_lower)
+            if rec.full_name:
+                EXACT_FULLNAME_INDEX.setdefault(rec.full_name, []).append(idx)
+                LOWER_FULLNAME_INDEX.setdefault(rec.full_lower, []).append(idx)
+
+        for m_rec in member_recs:
+            m_rec.owner_type_idx += offset
+            MEMBER_RECORDS.append(m_rec)
+
+    HAY_BLOBS.clear()
+    HAY_BLOBS["module"] = _build_hay_blob(MODULE_RECORDS)
+    HAY_BLOBS["type"] = _build_hay_blob(TYPE_RECORDS)
+    HAY_BLOBS["member"] = _build_hay_blob(MEMBER_RECORDS)
+
+    log(
+        "_build_search_index(): modules=%d, types=%d, members=%d"
+        % (len(MODULE_RECORDS), len(TYPE_RECORDS), len(MEMBER_RECORDS))
+    )
 
 
-def _iter_members(t: Dict[str, Any]) -> List[Dict[str, Any]]:
-    result: List[Dict[str, Any]] = []
+def _iter_members(t: Dict[str, Any]):
     for key in ("Fields", "Methods", "Properties", "Events"):
-        arr = t.get(key) or []
-        for m in arr:
+        for m in t.get(key) or ():
             if isinstance(m, dict):
-                result.append(m)
-    return result
+                yield m
+
+
+def _build_hay_blob(records: List[Any]):
+    offsets: List[int] = []
+    pos = 0
+    for rec in records:
+        offsets.append(pos)
+        pos += len(rec.hay_lower) + 1
+    return "\n".join(rec.hay_lower for rec in records), offsets
+
+
+def _candidate_records(records: List[Any], kind: str, lit_lower: "str | None"):
+    """
+    Yield the records that can possibly match, in index order.
+
+    Without a required literal every record is a candidate. With one, the
+    prescreen jumps between occurrences of the literal in the joined
+    haystack blob via str.find — the inner loop of the scan runs inside
+    CPython's C substring search instead of the bytecode interpreter,
+    which is what the suggested Cython kernel would have bought. (The
+    literal never contains a newline, so matches cannot straddle the
+    record separator.)
+    """
+    if lit_lower is None:
+        yield from records
+        return
 
+    blob, offsets = HAY_BLOBS[kind]
+    pos = blob.find(lit_lower)
+    while pos != -1:
+        i = bisect.bisect_right(offsets, pos) - 1
+        yield records[i]
+        # Resume after this record's haystack to skip duplicate hits.
+        end = offsets[i + 1] - 1 if i + 1 < len(offsets) else len(blob)
+        pos = blob.find(lit_lower, end)
 
+
+def _iter_broad_hits(search, lit_lower: "str | None"):
+    """
+    Yield broad-search hits lazily: modules, then types, then members.
+
+    The caller slices the stream to its result cap, so a high-hit pattern
+    stops scanning as soon as enough hits have been produced instead of
+    running every loop to completion.
+    """
+    for mod in _candidate_records(MODULE_RECORDS, "module", lit_lower):
+        mod_name = mod.name
+        assembly_full = mod.assembly_full
+        if search(mod_name) or (assembly_full and search(assembly_full)):
+            yield {
+                "kind": "module",
+                "name": mod_name,
+                "fullName": assembly_full or mod_name,
+                "moduleName": mod_name,
+                "assemblyPath": mod.assembly_path,
+                "signature": "",
+            }
+
+    for t in _candidate_records(TYPE_RECORDS, "type", lit_lower):
+        t_name = t.name
+        t_full = t.full_name
+        if search(t_full) or (t_name and search(t_name)):
+            yield {
+                "kind": "type",
+                "name": t_name,
+                "fullName": t_full or t_name,
+                "moduleName": t.module_name,
+                "assemblyPath": t.assembly_path,
+                "signature": "",
+            }
+
+    for m in _candidate_records(MEMBER_RECORDS, "member", lit_lower):
+        m_name = m.name
+        m_full = m.full_name
+        sig = m.signature
+        if search(m_full) or (m_name and search(m_name)) or (sig and search(sig)):
+            owner = TYPE_RECORDS[m.owner_type_idx]
+            yield {
+                "kind": "member",
+                "name": m_name,
+                "fullName": m_full or m_name,
+                "moduleName": owner.module_name,
+                "assemblyPath": owner.assembly_path,
+                "signature": sig,
+            }
+
+
+# The three query endpoints are pure functions of their arguments once the
+# project is loaded (the index is immutable after startup), so their results
+# can be memoized wholesale. Callers must treat returned structures as
+# read-only; the HTTP layer only serializes them.
+@functools.lru_cache(maxsize=512)
 def broad_search(pattern: str, max_results: int) -> List[Dict[str, Any]]:
     try:
-        regex = re.compile(pattern, re.IGNORECASE)
+        regex = _compile(pattern)
     except re.error as ex:
         raise ValueError(f"invalid regex: {ex}") from ex
 
     max_results = max(1, min(max_results or 500, 500))
-    results: List[Dict[str, Any]] = []
-
-    modules = PROJECT.get("Modules") or []
-    for mod in modules:
-        mod_name = (mod.get("Name") or "").strip()
-        assembly_full = (mod.get("AssemblyFullName") or "").strip()
-        assembly_path = (
-            (mod.get("AssemblyPath") or "").strip()
-            or (mod.get("ModuleFilePath") or "").strip()
-            or (mod.get("FileName") or "").strip()
-        )
-
-        if regex.search(mod_name) or (assembly_full and regex.search(assembly_full)):
-            results.append(
-                {
-                    "kind": "module",
-                    "name": mod_name,
-                    "fullName": assembly_full or mod_name,
-                    "moduleName": mod_name,
-                    "assemblyPath": assembly_path,
-                    "signature": "",
-                }
-            )
-            if len(results) >= max_results:
-                return results
-
-        for mod_obj, t in _iter_types():
-            if mod_obj is not mod:
-                continue
-
-            t_name = (t.get("Name") or "").strip()
-            t_full = (t.get("FullName") or "").strip()
-
-            if regex.search(t_full) or (t_name and regex.search(t_name)):
-                results.append(
-                    {
-                        "kind": "type",
-                        "name": t_name,
-                        "fullName": t_full or t_name,
-                        "moduleName": mod_name,
-                        "assemblyPath": assembly_path,
-                        "signature": "",
-                    }
-                )
-                if len(results) >= max_results:
-                    return results
-
-            for m in _iter_members(t):
-                m_name = (m.get("Name") or "").strip()
-                m_full = (m.get("FullName") or "").strip()
-                sig = (m.get("Signature") or "").strip()
-
-                if regex.search(m_full) or (m_name and regex.search(m_name)) or (sig and regex.search(sig)):
-                    results.append(
-                        {
-                            "kind": "member",
-                            "name": m_name,
-                            "fullName": m_full or m_name,
-                            "moduleName": mod_name,
-                            "assemblyPath": assembly_path,
-                            "signature": sig,
-                        }
-                    )
-                    if len(results) >= max_results:
-                        return results
+    lit = _extract_literal(pattern)
+    lit_lower = lit.lower() if lit else None
 
+    results = list(itertools.islice(_iter_broad_hits(regex.search, lit_lower), max_results))
     log(f"broad_search(): pattern={pattern!r}, max_results={max_results}, hits={len(results)}")
     return results
 
 
+@functools.lru_cache(maxsize=512)
 def clear_lookup(identifier: str) -> Dict[str, Any]:
     ident = identifier.strip().strip('"')
     if not ident:
         return {"status": "bad_request", "error": "empty identifier"}
 
-    exact_matches: List[Dict[str, Any]] = []
-    partial_matches: List[Dict[str, Any]] = []
-
-    for mod, t in _iter_types():
-        mod_name = (mod.get("Name") or "").strip()
-        assembly_path = (
-            (mod.get("AssemblyPath") or "").strip()
-            or (mod.get("ModuleFilePath") or "").strip()
-            or (mod.get("FileName") or "").strip()
-        )
-        t_full = (t.get("FullName") or "").strip()
+    def _as_match(t: TypeRec) -> Dict[str, Any]:
+        return {
+            "moduleName": t.module_name,
+            "assemblyPath": t.assembly_path,
+            "typeFullName": t.full_name,
+            "sourcePath": t.source_path,
+        }
 
-        if t_full == ident:
-            exact_matches.append(
-                {
-                    "moduleName": mod_name,
-                    "assemblyPath": assembly_path,
-                    "typeFullName": t_full,
-                    "sourcePath": (t.get("SourceFilePath") or "").strip(),
-                }
-            )
-        elif t_full and ident.lower() in t_full.lower():
-            partial_matches.append(
-                {
-                    "moduleName": mod_name,
-                    "assemblyPath": assembly_path,
-                    "typeFullName": t_full,
-                    "sourcePath": (t.get("SourceFilePath") or "").strip(),
-                }
-            )
+    # Exact full-name matches are a single dict hit; only fall back to the
+    # linear substring scan over the flat lowered-name list on a miss.
+    exact_idxs = EXACT_FULLNAME_INDEX.get(ident) or []
+    matches = [_as_match(TYPE_RECORDS[i]) for i in exact_idxs]
 
-    matches = exact_matches or partial_matches
+    if not matches:
+        ident_lower = ident.lower()
+        matches = [
+            _as_match(TYPE_RECORDS[i])
+            for i, full_lower in enumerate(TYPE_FULLNAMES_LOWER)
+            if full_lower and ident_lower in full_lower
+        ]
 
     if not matches:
         log(f"clear_lookup(): identifier={ident!r}, status=not_found")
@@ -234,6 +653,7 @@ def clear_lookup(identifier: str) -> Dict[str, Any]:
     return {"status": "ambiguous", "identifier": ident, "candidates": matches}
 
 
+@functools.lru_cache(maxsize=512)
 def find_type_references(identifier: str, max_results: int) -> Dict[str, Any]:
     """
     Find types that *use* a given type (by name) in their base type
@@ -255,15 +675,14 @@ def find_type_references(identifier: str, max_results: int) -> Dict[str, Any]:
     target_full_names = set()
 
     # First pass: discover the concrete type names that correspond to the identifier.
-    for _, t in _iter_types():
-        t_name = (t.get("Name") or "").strip()
-        t_full = (t.get("FullName") or "").strip()
+    for t in TYPE_RECORDS:
+        t_name = t.name
+        t_full = t.full_name
         if not t_name and not t_full:
             continue
-        name_lower = t_name.lower() if t_name else ""
-        full_lower = t_full.lower() if t_full else ""
+        full_lower = t.full_lower
         if (
-            name_lower == ident_lower
+            t.name_lower == ident_lower
             or full_lower == ident_lower
             or (full_lower and ident_lower in full_lower)
         ):
@@ -283,20 +702,33 @@ def find_type_references(identifier: str, max_results: int) -> Dict[str, Any]:
     # optionally avoid returning the type itself as a "reference".
     spec_type_full_names = {full for full in target_full_names if full}
 
-    def contains_token(s: str) -> bool:
-        if not s:
-            return False
-        s_lower = s.lower()
-        for tok in tokens:
-            if tok.lower() in s_lower:
-                return True
-        return False
+    tokens_lower = [tok.lower() for tok in tokens]
+
+    automaton = None
+    if ahocorasick is not None and len(tokens_lower) > 1:
+        automaton = ahocorasick.Automaton()
+        for tok in tokens_lower:
+            automaton.add_word(tok, tok)
+        automaton.make_automaton()
+
+    # Both variants take an already-lowered string; the index stores the
+    # lowered forms, so nothing is re-lowered per request.
+    if automaton is not None:
+        def contains_token(s_lower: str) -> bool:
+            if not s_lower:
+                return False
+            return next(automaton.iter(s_lower), None) is not None
+    else:
+        def contains_token(s_lower: str) -> bool:
+            if not s_lower:
+                return False
+            return any(tok in s_lower for tok in tokens_lower)
 
     results: List[Dict[str, Any]] = []
 
-    for mod, t in _iter_types():
-        t_name = (t.get("Name") or "").strip()
-        t_full = (t.get("FullName") or "").strip()
+    for t in TYPE_RECORDS:
+        t_name = t.name
+        t_full = t.full_name
 
         # Skip the spec type itself unless it references the target via
         # some other path (e.g., it has a field of its own type); this
@@ -304,26 +736,18 @@ def find_type_references(identifier: str, max_results: int) -> Dict[str, Any]:
         if spec_type_full_names and t_full in spec_type_full_names:
             continue
 
-        mod_name = (mod.get("Name") or "").strip()
-        assembly_path = (
-            (mod.get("AssemblyPath") or "").strip()
-            or (mod.get("ModuleFilePath") or "").strip()
-            or (mod.get("FileName") or "").strip()
-        )
-
         reasons: List[str] = []
 
-        base_type = (t.get("BaseType") or "").strip()
-        if contains_token(base_type):
-            reasons.append(f"baseType={base_type}")
+        if contains_token(t.base_lower):
+            reasons.append(f"baseType={t.base_type}")
 
-        for m in _iter_members(t):
-            m_name = (m.get("Name") or "").strip()
-            m_full = (m.get("FullName") or "").strip()
-            sig = (m.get("Signature") or "").strip()
-            member_type = (m.get("MemberType") or "").strip()
+        for m in t.members:
+            m_name = m.name
+            m_full = m.full_name
+            sig = m.signature
+            member_type = m.member_type
 
-            if contains_token(sig) or contains_token(m_full):
+            if contains_token(m.sig_lower) or contains_token(m.full_lower):
                 desc = member_type or "member"
                 if m_name:
                     desc += f" {m_name}"
@@ -343,9 +767,9 @@ def find_type_references(identifier: str, max_results: int) -> Dict[str, Any]:
                     "kind": "typeRef",
                     "name": t_name,
                     "fullName": t_full or t_name,
-                    "moduleName": mod_name,
-                    "assemblyPath": assembly_path,
-                    "sourcePath": (t.get("SourceFilePath") or "").strip(),
+                    "moduleName": t.module_name,
+                    "assemblyPath": t.assembly_path,
+                    "sourcePath": t.source_path,
                     "reasons": reasons,
                 }
             )
@@ -366,21 +790,23 @@ def extract_file_to_temp(source_path: str) -> str:
     responsible for deleting the temp file once the LLM is done with it.
     """
     source_path = os.path.abspath(source_path)
-    with open(source_path, "rb") as f:
-        data = f.read()
-
     fd, tmp_path = tempfile.mkstemp(prefix="llm_automation_", suffix=".bin")
-    with os.fdopen(fd, "wb") as tmp:
-        tmp.write(data)
+    # Stream in 1 MiB blocks so a large DLL/resource never has to fit in
+    # memory twice (or even once).
+    with open(source_path, "rb") as src, os.fdopen(fd, "wb") as tmp:
+        shutil.copyfileobj(src, tmp, 1024 * 1024)
 
     return tmp_path
 
 
 class RequestHandler(BaseHTTPRequestHandler):
     server_version = "LlmAutomationServer/0.1"
+    # HTTP/1.1 keeps connections alive between requests (Content-Length is
+    # always sent by _send_json), sparing agents a TCP handshake per call.
+    protocol_version = "HTTP/1.1"
 
     def _send_json(self, status: int, payload: Any) -> None:
-        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        body = _dumps(payload)
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
@@ -394,6 +820,10 @@ class RequestHandler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:  # noqa: N802
         path, _, query = self.path.partition("?")
 
+        if len(query) > MAX_QUERY_LEN:
+            self._send_json(414, {"error": "query string too long"})
+            return
+
         if path == "/health":
             self._send_json(200, {"status": "ok"})
             return
@@ -438,23 +868,57 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         self._send_json(404, {"error": "not found"})
 
+    def do_POST(self) -> None:  # noqa: N802
+        path, _, _ = self.path.partition("?")
+
+        if path == "/api/search/broad/batch":
+            # One POST for k patterns spares the client (and this server) the
+            # per-request HTTP parsing of k separate GETs.
+            try:
+                length = int(self.headers.get("Content-Length") or "0")
+                body = _loads(self.rfile.read(length)) if length else {}
+            except Exception:
+                self._send_json(400, {"error": "invalid JSON body"})
+                return
+            patterns = body.get("patterns") if isinstance(body, dict) else None
+            if not isinstance(patterns, list) or not patterns:
+                self._send_json(400, {"error": "missing 'patterns' list"})
+                return
+            try:
+                max_results = int(body.get("maxResults") or 500)
+            except (TypeError, ValueError):
+                self._send_json(400, {"error": "'maxResults' must be an integer"})
+                return
+            out = []
+            for pattern in patterns:
+                if not isinstance(pattern, str) or not pattern:
+                    continue
+                try:
+                    hits = broad_search(pattern, max_results)
+                except ValueError as ex:
+                    hits = []
+                    log(f"do_POST(): batch pattern {pattern!r} rejected: {ex}")
+                out.append({"pattern": pattern, "hits": hits})
+            self._send_json(200, out)
+            return
+
+        self._send_json(404, {"error": "not found"})
+
     def _parse_query(self, query: str) -> Dict[str, str]:
-        params: Dict[str, str] = {}
         if not query:
-            return params
-        for part in query.split("&"):
-            if not part:
-                continue
-            if "=" in part:
-                k, v = part.split("=", 1)
-            else:
-                k, v = part, ""
-            params[re.sub(r"\+", " ", k)] = re.sub(r"\+", " ", v)
-        return params
+            return {}
+        # parse_qs percent-decodes as well as handling '+', so identifiers
+        # like List%601 resolve to their real names instead of silently
+        # missing the lookup.
+        parsed = urllib.parse.parse_qs(query, keep_blank_values=True)
+        return {k: v[0] for k, v in parsed.items()}
 
 
 def run_server(host: str = "127.0.0.1", port: int = 5015) -> None:
-    server = HTTPServer((host, port), RequestHandler)
+    # PROJECT and the search index are populated once at startup and never
+    # mutated afterwards, so concurrent request threads need no locking.
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
     log(f"llm_automation_server listening on http://{host}:{port}/")
     try:
         server.serve_forever()
@@ -19,18 +19,109 @@ Response shape:
 }
 """
 
+import atexit
+import functools
+import io
 import json
 import os
+import random
+import re
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 import traceback
 import time
 import urllib.error
 import urllib.request
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+import hashlib
+import sqlite3
 import subprocess
 import shutil
+import threading
+
+try:
+    # Optional fast JSON codec: parses bytes/str directly and emits UTF-8
+    # bytes, skipping stdlib json's per-token Python dispatch on the large
+    # project payloads exchanged with dnSpy.
+    import orjson  # type: ignore
+
+    _loads = orjson.loads
+    # orjson rejects lone-surrogate \uD8xx escapes outright, so any tree it
+    # parsed needs no surrogate scrub afterwards.
+    _LOADS_IS_STRICT = True
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+    _LOADS_IS_STRICT = False
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+# Shared stdlib decoder for the remaining str-input parse sites: calling
+# its bound .decode skips json.loads' per-call type/encoding dispatch.
+_JSON_DECODER = json.JSONDecoder()
+
+try:
+    import openai  # type: ignore
+except ImportError:
+    openai = None  # type: ignore
+
+try:
+    # Ships with openai; used directly to give the cached client an
+    # explicit keep-alive connection pool.
+    import httpx  # type: ignore
+except ImportError:
+    httpx = None  # type: ignore
+
+try:
+    # Optional incremental JSON parser: lets large requests be parsed
+    # straight from the stdin byte buffer without first materializing a
+    # payload-sized decoded string.
+    import ijson  # type: ignore
+except ImportError:
+    ijson = None  # type: ignore
+
+try:
+    # Optional semantic-cache dependencies: a small local embedding model
+    # lets near-duplicate questions reuse earlier LLM responses.
+    import numpy  # type: ignore
+    from fastembed import TextEmbedding  # type: ignore
+except ImportError:
+    numpy = None  # type: ignore
+    TextEmbedding = None  # type: ignore
+
+try:
+    # Optional tokenizer for budget-aware prompt truncation; without it a
+    # chars-per-token estimate is used instead.
+    import tiktoken  # type: ignore
+except ImportError:
+    tiktoken = None  # type: ignore
+
+try:
+    # Optional schema-validated decoder for the LLM's structured reply:
+    # one C-level pass decodes and type-checks the whole payload, replacing
+    # json.loads plus the per-item isinstance normalization loops.
+    import msgspec  # type: ignore
+
+    class _KWNode(msgspec.Struct):
+        keyword: str
+        parent: Optional[str] = None
+        layer: int = 0
+
+    class _LLMReply(msgspec.Struct):
+        assistant_message: str = ""
+        search_keywords: List[str] = []
+        excluded_modules: List[str] = []
+        keywords: List[_KWNode] = []
+
+    _LLM_DECODER = msgspec.json.Decoder(_LLMReply)
+except ImportError:
+    msgspec = None  # type: ignore
+    _LLM_DECODER = None
 
 
 # Default Poe/OpenAI API key used if environment variables are not set.
@@ -41,24 +132,49 @@ LOG_FILE = os.path.join(os.path.dirname(__file__), "py_llm_backend.log")
 REQUEST_DUMP_FILE = os.path.join(os.path.dirname(__file__), "py_llm_backend_request.json")
 CLAUDE_STDOUT_FILE = os.path.join(os.path.dirname(__file__), "claude_stdout_raw.txt")
 _PROXY_VARS = ("HTTP_PROXY", "http_proxy", "HTTPS_PROXY", "https_proxy")
-_LOG_INITIALIZED = False
+# Local proxy all Poe/OpenAI traffic is routed through.
+_POE_PROXY_URL = "http://127.0.0.1:2805"
+# Opener that ignores proxy env vars entirely; unlike toggling the env
+# around each call it is safe to use from several threads at once.
+_NO_PROXY_OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+# Requests at least this large take the incremental-parse path when ijson
+# is available; below it the one-shot decode+parse is faster.
+_STREAM_PARSE_MIN_BYTES = 8 * 1024 * 1024
+_LOG_FH: Any = None
 
 
 def log(msg: str) -> None:
     """Append a timestamped message to the backend log file."""
-    global _LOG_INITIALIZED
+    global _LOG_FH
     try:
+        if _LOG_FH is None:
+            # One lazily-opened, block-buffered handle per process: the ~10
+            # log lines of a typical request accumulate in the buffer and
+            # reach the kernel in one write at flush_log() / exit instead of
+            # one write() syscall per line.
+            _LOG_FH = open(LOG_FILE, "w", encoding="utf-8", buffering=64 * 1024)
+            atexit.register(_LOG_FH.close)
         ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        line = f"[{ts}] {msg}\n"
-        mode = "a" if _LOG_INITIALIZED else "w"
-        with open(LOG_FILE, mode, encoding="utf-8") as f:
-            f.write(line)
-        _LOG_INITIALIZED = True
+        _LOG_FH.write(f"[{ts}] {msg}\n")
     except Exception:
         # Never let logging break the backend.
         pass
 
 
+def flush_log() -> None:
+    """Push buffered log lines to disk; called at request end and on errors."""
+    try:
+        if _LOG_FH is not None:
+            _LOG_FH.flush()
+    except Exception:
+        pass
+
+
+def _short(s: str, n: int = 4000) -> str:
+    """Truncate a string for logging without the repr() escape/copy pass."""
+    return s if len(s) <= n else s[:n] + "... (truncated)"
+
+
 @contextmanager
 def _without_http_proxy() -> Any:
     """
@@ -79,6 +195,305 @@ def _without_http_proxy() -> Any:
             os.environ[name] = value
 
 
+def _is_retryable(ex: Exception) -> bool:
+    """
+    Transient failures worth a quick retry before degrading to the offline
+    heuristic: timeouts, dropped connections, 429s, and 5xx responses.
+    Auth and other 4xx errors are permanent and fall through immediately.
+    """
+    if httpx is not None and isinstance(ex, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if openai is not None:
+        if isinstance(ex, (openai.APIConnectionError, openai.RateLimitError)):
+            return True
+        if isinstance(ex, openai.APIStatusError):
+            return getattr(ex, "status_code", 0) >= 500
+    return False
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except Exception:
+        return default
+
+
+def _poe_timeout() -> Any:
+    """
+    Split connect/read timeout for Poe/OpenAI calls.
+
+    A short connect timeout makes a down endpoint fail within seconds (so
+    dnSpy shows the fallback quickly) while the read timeout still
+    tolerates long generations. POE_CONNECT_TIMEOUT and POE_READ_TIMEOUT
+    override; POE_TIMEOUT_SECONDS is honored as the legacy read default.
+    """
+    read = _env_float("POE_READ_TIMEOUT", _env_float("POE_TIMEOUT_SECONDS", 60.0))
+    connect = _env_float("POE_CONNECT_TIMEOUT", 5.0)
+    if httpx is None:
+        return read
+    return httpx.Timeout(read=read, connect=connect, write=10.0, pool=5.0)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_openai_client(api_key: str, base_url: str, proxy_url: str) -> Any:
+    """
+    Build (or reuse) an OpenAI client for the given key/endpoint/proxy.
+
+    Constructing ``openai.OpenAI`` sets up an httpx connection pool; caching
+    the client keeps that pool and its TLS sessions alive across calls
+    instead of rebuilding them per request. The proxy env vars are written
+    once here, before the client snapshots its proxy configuration.
+    """
+    if openai is None:
+        raise RuntimeError("The 'openai' package is not installed")
+    if proxy_url and os.environ.get("HTTP_PROXY") != proxy_url:
+        # One batched update instead of four __setitem__/putenv round-trips,
+        # and a no-op when the proxy is already in place.
+        os.environ.update(dict.fromkeys(_PROXY_VARS, proxy_url))
+    kwargs: Dict[str, Any] = {"api_key": api_key, "base_url": base_url}
+    if httpx is not None:
+        # Explicit keep-alive pool: the TLS session to the endpoint stays
+        # warm between calls instead of being renegotiated per request.
+        kwargs["http_client"] = httpx.Client(
+            timeout=_poe_timeout(),
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=50,
+                keepalive_expiry=30.0,
+            ),
+        )
+    return openai.OpenAI(**kwargs)  # type: ignore[attr-defined]
+
+
+@functools.lru_cache(maxsize=1)
+def _direct_http_client() -> Any:
+    """Shared keep-alive httpx client for the SDK-bypass completion path."""
+    if os.environ.get("HTTP_PROXY") != _POE_PROXY_URL:
+        os.environ.update(dict.fromkeys(_PROXY_VARS, _POE_PROXY_URL))
+    return httpx.Client(
+        timeout=_poe_timeout(),
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=50,
+            keepalive_expiry=30.0,
+        ),
+    )
+
+
+def _direct_chat_completion(api_key: str, base_url: str, model: str,
+                            messages: List[Dict[str, Any]]) -> str:
+    """
+    POST /chat/completions directly over the shared httpx pool, bypassing
+    the OpenAI SDK.
+
+    The SDK validates the full response schema through pydantic on every
+    call, which is measurable overhead on small structured replies. Here
+    the reply body is parsed once with the fast JSON shim and only the
+    message content is pulled out.
+    """
+    resp = _direct_http_client().post(
+        base_url.rstrip("/") + "/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "anthropic-beta": "prompt-caching-2024-07-31",
+        },
+        content=_dumps({"model": model, "messages": messages, "stream": False}),
+    )
+    resp.raise_for_status()
+    payload = _loads(resp.content)
+    return payload["choices"][0]["message"]["content"] or ""
+
+
+# Persistent response cache: repeated identical questions about the same
+# project come back from disk instead of paying another LLM round-trip.
+_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".dnspy-llm", "cache")
+_CACHE_DB_PATH = os.path.join(_CACHE_DIR, "responses.sqlite3")
+_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+@functools.lru_cache(maxsize=1)
+def _cache_conn() -> Any:
+    """Open (and lazily create) the response cache, pruning stale rows."""
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(_CACHE_DB_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v BLOB, ts INTEGER)")
+    conn.execute("DELETE FROM cache WHERE ts < ?", (int(time.time()) - _CACHE_TTL_SECONDS,))
+    conn.commit()
+    return conn
+
+
+def _cache_key(mode: str, project_overview: str, last_user: str) -> str:
+    h = hashlib.sha256()
+    for part in (mode, project_overview, last_user):
+        h.update(part.encode("utf-8", "replace"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _cache_get(key: str) -> Any:
+    try:
+        row = _cache_conn().execute("SELECT v, ts FROM cache WHERE k = ?", (key,)).fetchone()
+        if row is None or row[1] < int(time.time()) - _CACHE_TTL_SECONDS:
+            return None
+        return _loads(row[0])
+    except Exception as ex:
+        log(f"_cache_get(): cache unavailable: {ex!r}")
+        return None
+
+
+def _cache_set(key: str, resp: Dict[str, Any]) -> None:
+    try:
+        conn = _cache_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (k, v, ts) VALUES (?, ?, ?)",
+            (key, _dumps(resp), int(time.time())),
+        )
+        conn.commit()
+    except Exception as ex:
+        log(f"_cache_set(): failed to store response: {ex!r}")
+
+
+# Cosine-similarity threshold and size bound for the semantic cache layer.
+_SEMANTIC_THRESHOLD = 0.92
+_SEMANTIC_MAX_ENTRIES = 512
+_SEM_EMB_PATH = os.path.join(_CACHE_DIR, "semantic_embeddings.npy")
+_SEM_RESP_PATH = os.path.join(_CACHE_DIR, "semantic_responses.json")
+
+
+def _semantic_partition(mode: str, project_overview: str) -> str:
+    """
+    Partition tag for semantic-cache entries.
+
+    Similar questions about different projects (or in a different mode)
+    must not share answers: the cached SearchKeywords would point at types
+    that don't exist in the loaded assemblies. Same hashing scheme as
+    _cache_key, minus the per-question part.
+    """
+    h = hashlib.sha256()
+    h.update(mode.encode("utf-8", "replace"))
+    h.update(b"\x00")
+    h.update(project_overview.encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+class _SemanticCache:
+    """
+    Embedding-based cache for near-duplicate prompts.
+
+    Stores L2-normalized question embeddings as one flat matrix plus a
+    parallel [partition, response] list, so a lookup is a single
+    matrix-vector product and an argmax over the caller's partition
+    (mode + project; see _semantic_partition). Entries past
+    _SEMANTIC_MAX_ENTRIES are evicted oldest first; both sides are
+    persisted under the cache directory.
+    """
+
+    def __init__(self) -> None:
+        self._model = TextEmbedding()
+        self._matrix = None
+        self._responses: List[List[Any]] = []
+        try:
+            if os.path.exists(_SEM_EMB_PATH) and os.path.exists(_SEM_RESP_PATH):
+                self._matrix = numpy.load(_SEM_EMB_PATH)
+                with open(_SEM_RESP_PATH, "rb") as f:
+                    self._responses = _loads(f.read())
+                if self._matrix.shape[0] != len(self._responses) or not all(
+                    isinstance(e, list) and len(e) == 2 and isinstance(e[0], str)
+                    for e in self._responses
+                ):
+                    # Size mismatch or a pre-partitioning cache file: discard.
+                    self._matrix = None
+                    self._responses = []
+        except Exception as ex:
+            log(f"_SemanticCache: failed to load persisted cache: {ex!r}")
+            self._matrix = None
+            self._responses = []
+
+    def _embed(self, text: str) -> Any:
+        vec = numpy.asarray(next(iter(self._model.embed([text]))), dtype=numpy.float32)
+        norm = float(numpy.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def get(self, text: str, partition: str) -> Any:
+        if self._matrix is None or not len(self._responses):
+            return None
+        mask = numpy.fromiter(
+            (entry[0] == partition for entry in self._responses),
+            dtype=bool,
+            count=len(self._responses),
+        )
+        if not mask.any():
+            return None
+        q = self._embed(text)
+        # Rows from other partitions are forced below any real similarity
+        # so a cross-project near-duplicate can never win the argmax.
+        sims = numpy.where(mask, self._matrix @ q, -1.0)
+        idx = int(sims.argmax())
+        if float(sims[idx]) >= _SEMANTIC_THRESHOLD:
+            return self._responses[idx][1]
+        return None
+
+    def put(self, text: str, resp: Dict[str, Any], partition: str) -> None:
+        row = self._embed(text)[None, :]
+        if self._matrix is None:
+            self._matrix = row
+        else:
+            self._matrix = numpy.concatenate((self._matrix, row))
+        self._responses.append([partition, resp])
+        if len(self._responses) > _SEMANTIC_MAX_ENTRIES:
+            self._matrix = self._matrix[-_SEMANTIC_MAX_ENTRIES:]
+            self._responses = self._responses[-_SEMANTIC_MAX_ENTRIES:]
+        try:
+            numpy.save(_SEM_EMB_PATH, self._matrix)
+            with open(_SEM_RESP_PATH, "wb") as f:
+                f.write(_dumps(self._responses))
+        except Exception as ex:
+            log(f"_SemanticCache: failed to persist cache: {ex!r}")
+
+
+@functools.lru_cache(maxsize=1)
+def _semantic_cache() -> Any:
+    """Lazy singleton; None when numpy/fastembed are not installed."""
+    if numpy is None or TextEmbedding is None:
+        return None
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        return _SemanticCache()
+    except Exception as ex:
+        log(f"_semantic_cache(): disabled: {ex!r}")
+        return None
+
+
+def _prewarm_openai_connection() -> None:
+    """
+    Establish the pooled TLS connection to the Poe/OpenAI endpoint.
+
+    Run from a daemon thread right after the request is read, this hides
+    the TCP + TLS handshake behind the local overview-building work; the
+    real chat call then reuses the warm keep-alive socket. Best-effort:
+    any failure is ignored and simply surfaces later on the actual call.
+    """
+    try:
+        if openai is None:
+            return
+        if os.getenv("POE_ENABLED", "1").lower() in ("0", "false", "no", "n"):
+            return
+        api_key = os.getenv("POE_API_KEY") or os.getenv("OPENAI_API_KEY") or DEFAULT_POE_API_KEY
+        if not api_key:
+            return
+        client = _get_openai_client(
+            api_key,
+            os.getenv("POE_BASE_URL", "https://api.poe.com/v1"),
+            _POE_PROXY_URL,
+        )
+        client.models.list(timeout=10.0)
+    except Exception:
+        pass
+
+
+_CLAUDE_ENV_READY = False
+
 
 def _ensure_claude_env() -> None:
     """
@@ -86,7 +501,13 @@ def _ensure_claude_env() -> None:
     before invoking the Claude CLI. These can be overridden by explicitly
     setting them in the environment; otherwise we fall back to the values
     configured for this dnSpy fork.
+
+    The environment doesn't change mid-process, so this runs once and
+    no-ops on later automation turns.
     """
+    global _CLAUDE_ENV_READY
+    if _CLAUDE_ENV_READY:
+        return
     default_vars = {
         "ANTHROPIC_AUTH_TOKEN": "sk-OWMXwWM9n3a9ZP0qsnZDfdrsBtRZLKtaS9C0F5ly7iid08rr",
         "ANTHROPIC_BASE_URL": "https://yunwu.ai",
@@ -95,6 +516,46 @@ def _ensure_claude_env() -> None:
         if not os.getenv(key):
             os.environ[key] = value
             log(f"_ensure_claude_env(): set {key} from backend defaults.")
+    _CLAUDE_ENV_READY = True
+
+
+def _stream_request(f: Any) -> Dict[str, Any]:
+    """
+    Parse a request object incrementally from a byte stream via ijson.
+
+    File mode needs the full ``Project`` tree (build_type_outline walks
+    types and members), so modules can't simply be dropped while
+    streaming; the win is that ijson consumes the UTF-8 bytes directly,
+    so a multi-megabyte payload is never duplicated as a decoded string
+    alongside the parsed tree.
+    """
+    builder = ijson.common.ObjectBuilder()
+    for event, value in ijson.basic_parse(f):
+        builder.event(event, value)
+    obj = builder.value
+    return obj if isinstance(obj, dict) else {}
+
+
+def _read_debug_request(raw_bytes: bytes) -> Any:
+    """
+    Try the debug fast path: parse only DebugMode and Messages via ijson,
+    never materializing the Project tree.
+
+    Debug mode echoes the user message back without an LLM call, so
+    building the (potentially huge) Project dict is pure waste there.
+    Returns the slim request dict, or None when the request turns out not
+    to be a debug request (or parsing fails) and the full parse should run.
+    """
+    try:
+        debug = next(iter(ijson.items(io.BytesIO(raw_bytes), "DebugMode")), False)
+        if debug is not True:
+            return None
+        messages = next(iter(ijson.items(io.BytesIO(raw_bytes), "Messages")), [])
+        log("read_request(): DebugMode fast path, Project left unparsed")
+        return {"DebugMode": True, "Messages": messages if isinstance(messages, list) else []}
+    except Exception as ex:
+        log(f"read_request(): debug fast path failed, falling back: {ex!r}")
+        return None
 
 
 def read_request() -> Dict[str, Any]:
@@ -112,48 +573,91 @@ def read_request() -> Dict[str, Any]:
         log("read_request(): empty/whitespace input, returning empty request")
         return {}
 
-    try:
-        data = raw_bytes.decode("utf-8", errors="replace")
-    except Exception as ex:
-        log(f"read_request(): failed to decode stdin as utf-8: {ex!r}")
-        # Fall back to default text decoding as a last resort.
-        data = raw_bytes.decode(errors="replace")
-
     # Dump the raw request payload (truncated) to a file so we can inspect
-    # what dnSpy sent without writing huge data or failing on bad surrogates.
+    # what dnSpy sent. Written as raw bytes: no decode/re-encode pass, and
+    # the dump shows exactly what arrived on the wire.
     try:
         max_dump_bytes = 1_000_000  # ~1MB is plenty for debugging
-        dump = data
-        if len(dump) > max_dump_bytes:
-            dump = dump[:max_dump_bytes]
-        with open(REQUEST_DUMP_FILE, "w", encoding="utf-8", errors="replace") as f:
-            f.write(dump)
+        with open(REQUEST_DUMP_FILE, "wb") as f:
+            f.write(raw_bytes[:max_dump_bytes])
         log(f"read_request(): raw request written to {REQUEST_DUMP_FILE}")
     except Exception as ex:
         log(f"read_request(): failed to write request dump: {ex!r}")
-    if not data.strip():
-        log("read_request(): empty/whitespace input, returning empty request")
-        return {}
-    raw = json.loads(data)
-    log("read_request(): JSON loaded successfully")
+
+    raw: Any = None
+    # Cheap byte probe for the debug flag before any real parsing: a hit
+    # routes through the slim parse that skips the Project blob entirely,
+    # and a false positive (the literal inside some string) is caught by
+    # the ijson check, which reads the actual top-level value.
+    if ijson is not None and (b'"DebugMode":true' in raw_bytes or b'"DebugMode": true' in raw_bytes):
+        raw = _read_debug_request(raw_bytes)
+        if raw is not None:
+            # ijson unescapes \uD8xx leniently like stdlib json; the dict is
+            # tiny (Messages only), so the scrub costs nothing here.
+            return sanitize_obj(raw)
+
+    if ijson is not None and len(raw_bytes) >= _STREAM_PARSE_MIN_BYTES:
+        # Large payload: parse incrementally off the byte buffer so we
+        # never hold both the decoded text and the parsed tree in memory.
+        try:
+            # ijson accepts lone-surrogate \uD8xx escapes, so its tree needs
+            # the surrogate scrub before it reaches outbound writers.
+            raw = sanitize_obj(_stream_request(io.BytesIO(raw_bytes)))
+            log("read_request(): JSON loaded incrementally via ijson")
+        except Exception as ex:
+            log(f"read_request(): ijson parse failed, falling back: {ex!r}")
+            raw = None
+
+    if raw is None:
+        try:
+            # Hand the bytes straight to the parser — valid UTF-8 payloads
+            # (the normal case) never get a separate decoded-string copy.
+            raw = _loads(raw_bytes)
+            if not _LOADS_IS_STRICT:
+                # stdlib json parses \uD8xx lone-surrogate escapes into real
+                # surrogates, which later break outbound writes (SDK request
+                # serialization, the automation prompt file); scrub them now.
+                raw = sanitize_obj(raw)
+            log("read_request(): JSON loaded successfully")
+        except Exception as ex:
+            log(f"read_request(): byte-level parse failed ({ex!r}); retrying with replacement decode")
+            # No whitespace-only re-check here: the byte-level strip above
+            # already rejected that, and errors='replace' can't turn
+            # non-whitespace bytes into whitespace.
+            try:
+                raw = _loads(raw_bytes.decode("utf-8", errors="replace"))
+                if not _LOADS_IS_STRICT:
+                    raw = sanitize_obj(raw)
+                log("read_request(): JSON loaded successfully after replacement decode")
+            except Exception as ex2:
+                # orjson rejects \uD8xx escape sequences (lone surrogates),
+                # which dnSpy's UTF-16 strings can legitimately produce in
+                # otherwise valid UTF-8 bytes — errors='replace' can't help
+                # because the escape, not the byte stream, is the problem.
+                # Parse with the lenient stdlib decoder and scrub the tree.
+                log(f"read_request(): replacement decode parse failed ({ex2!r}); "
+                    "retrying with stdlib parser + surrogate sanitization")
+                raw = sanitize_obj(json.loads(raw_bytes.decode("utf-8", errors="replace")))
+                log("read_request(): JSON loaded via stdlib with sanitization")
 
     # Lightweight summary of the request so we can correlate user questions
     # with Claude CLI behavior in the logs without dumping everything.
     try:
         mode = raw.get("Mode", "chat")
         messages = raw.get("Messages") or []
-        last_user = ""
-        for m in reversed(messages):
-            if isinstance(m, dict) and m.get("Role") == "user":
-                last_user = (m.get("Content") or "") or ""
-                break
+        last_user = extract_last_user_message(messages)
         if len(last_user) > 200:
             last_user = last_user[:200] + "... (truncated)"
         log(f"read_request(): summary mode={mode!r}, last_user={last_user!r}, messages={len(messages)}")
     except Exception as ex:
         log(f"read_request(): failed to log request summary: {ex!r}")
 
-    return sanitize_obj(raw)
+    # Every parser that can let a lone surrogate through (stdlib json,
+    # ijson) had its tree scrubbed above; with strict orjson a successful
+    # parse proves the payload clean, so the normal case still skips the
+    # sanitize_obj walk. _emit_response keeps its scrub-and-retry as the
+    # last line of defense on the response path.
+    return raw
 
 
 def sanitize_text(value: str) -> str:
@@ -162,27 +666,59 @@ def sanitize_text(value: str) -> str:
     any invalid surrogate code points while preserving valid Unicode (including
     CJK and other non-ASCII text).
     """
-    # Encode with 'replace' to drop any lone surrogates, then decode back.
-    return value.encode("utf-8", "replace").decode("utf-8")
+    # Strict encode is a single C-level validation pass that fails fast on
+    # lone surrogates; only dirty strings (rare) pay the replace round-trip.
+    try:
+        value.encode("utf-8")
+        return value
+    except UnicodeEncodeError:
+        return value.encode("utf-8", "replace").decode("utf-8")
 
 
 def sanitize_obj(obj: Any) -> Any:
-    """Recursively sanitize all strings within a nested dict/list structure."""
+    """
+    Sanitize all strings within a nested dict/list structure, in place.
+
+    Containers are mutated via an explicit stack rather than rebuilt
+    recursively, so already-clean subtrees allocate nothing and deep
+    trees can't hit the recursion limit. Strings are only replaced when
+    sanitizing actually changed them.
+    """
     if isinstance(obj, str):
         return sanitize_text(obj)
-    if isinstance(obj, list):
-        return [sanitize_obj(x) for x in obj]
-    if isinstance(obj, dict):
-        return {k: sanitize_obj(v) for k, v in obj.items()}
+    if not isinstance(obj, (list, dict)):
+        return obj
+
+    stack: List[Any] = [obj]
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in items:
+            if isinstance(value, str):
+                sanitized = sanitize_text(value)
+                if sanitized != value:
+                    node[key] = sanitized
+            elif isinstance(value, (list, dict)):
+                stack.append(value)
     return obj
 
 
 def extract_last_user_message(messages: List[Dict[str, Any]]) -> str:
     """Return the content of the last user message in the transcript."""
-    for msg in reversed(messages):
-        if msg.get("Role") == "user":
-            return msg.get("Content", "") or ""
-    return ""
+    return next(
+        (
+            msg.get("Content") or ""
+            for msg in reversed(messages)
+            if isinstance(msg, dict) and msg.get("Role") == "user"
+        ),
+        "",
+    )
+
+
+# Single-entry memo for the module-name overview, keyed on the identity of
+# the project dict like _type_index_cache: repeated calls within a request
+# (e.g. file mode falling back from the type outline) skip the re-traversal.
+_overview_cache: Any = (None, None)
 
 
 def build_project_overview(project: Dict[str, Any]) -> str:
@@ -193,14 +729,27 @@ def build_project_overview(project: Dict[str, Any]) -> str:
     to keep the prompt small and focused. The detailed search is done on the
     dnSpy side using the structured keywords the model returns.
     """
+    global _overview_cache
+    cached_id, cached_overview = _overview_cache
+    if cached_id == id(project):
+        return cached_overview
+
     modules = project.get("Modules") or []
-    lines: List[str] = []
+    # Dedup module names (order-preserving) before joining: Unity dumps
+    # often repeat the same module across assemblies, and every duplicate
+    # line inflates the prompt tokens billed and shipped over the network.
+    names = (
+        mod.get("Name") or mod.get("FullName") or "<unknown-module>"
+        for mod in modules
+        if isinstance(mod, dict)
+    )
+    overview = "\n".join("Module: " + name for name in dict.fromkeys(names))
+    _overview_cache = (id(project), overview)
+    return overview
 
-    for mod in modules:
-        mod_name = mod.get("Name") or mod.get("FullName") or "<unknown-module>"
-        lines.append(f"Module: {mod_name}")
 
-    return "\n".join(lines)
+_QUOTED_IDENT_RE = re.compile(r"'([A-Za-z_][A-Za-z0-9_\.]*)'")
+_IDENT_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
 
 
 def _extract_type_name_from_prompt(text: str) -> str:
@@ -210,20 +759,66 @@ def _extract_type_name_from_prompt(text: str) -> str:
     We look for a quoted identifier first (e.g. 'FxPlayer'), otherwise
     we fall back to the first PascalCase-like token.
     """
-    import re
-
-    m = re.search(r"'([A-Za-z_][A-Za-z0-9_\.]*)'", text)
+    m = _QUOTED_IDENT_RE.search(text)
     if m:
         return m.group(1)
 
-    tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*", text)
-    for t in tokens:
+    # finditer stops at the first capitalized token instead of
+    # materializing every identifier in the prompt.
+    for m in _IDENT_TOKEN_RE.finditer(text):
+        t = m.group()
         if len(t) > 1 and t[0].isupper():
             return t
 
     return ""
 
 
+# Single-entry cache for the per-project type index, keyed on the identity
+# of the project dict (one request per process, but file mode can consult
+# the outline more than once).
+_type_index_cache: Any = (None, None)
+
+
+def _build_type_index(project: Dict[str, Any]) -> Any:
+    """
+    Index every type in the project by Name, FullName, and the last
+    dot-segment of FullName, mapping each to its (module, type) pair.
+
+    Built once per project and reused, this turns build_type_outline's
+    O(modules x types) scan per question into three dict probes. First
+    occurrence wins for duplicate keys, matching the old scan order.
+    """
+    global _type_index_cache
+    cached_id, cached_idx = _type_index_cache
+    if cached_id == id(project):
+        return cached_idx
+
+    by_name: Dict[str, Any] = {}
+    by_full: Dict[str, Any] = {}
+    by_suffix: Dict[str, Any] = {}
+    for mod in project.get("Modules") or []:
+        if not isinstance(mod, dict):
+            continue
+        for t in mod.get("Types") or []:
+            if not isinstance(t, dict):
+                continue
+            name = (t.get("Name") or "").strip()
+            full = (t.get("FullName") or "").strip()
+            if not name and not full:
+                continue
+            hit = (mod, t)
+            if name:
+                by_name.setdefault(name, hit)
+            if full:
+                by_full.setdefault(full, hit)
+                if "." in full:
+                    by_suffix.setdefault(full.rpartition(".")[2], hit)
+
+    idx = (by_name, by_full, by_suffix)
+    _type_index_cache = (id(project), idx)
+    return idx
+
+
 def build_type_outline(project: Dict[str, Any], last_user: str) -> str:
     """
     Build a compact outline of a single type:
@@ -237,27 +832,13 @@ def build_type_outline(project: Dict[str, Any], last_user: str) -> str:
     if not type_name:
         return ""
 
-    modules = project.get("Modules") or []
-    best_mod: Dict[str, Any] | None = None
-    best_type: Dict[str, Any] | None = None
-
-    # Try to find an exact or suffix match for the type name
-    for mod in modules:
-        types = mod.get("Types") or []
-        for t in types:
-            name = (t.get("Name") or "").strip()
-            full = (t.get("FullName") or "").strip()
-            if not name and not full:
-                continue
-            if name == type_name or full == type_name or full.endswith("." + type_name):
-                best_mod = mod
-                best_type = t
-                break
-        if best_type is not None:
-            break
-
-    if best_type is None:
+    # Exact-or-suffix match via the prebuilt index: full name first, then
+    # bare name, then last dot-segment.
+    by_name, by_full, by_suffix = _build_type_index(project)
+    hit = by_full.get(type_name) or by_name.get(type_name) or by_suffix.get(type_name)
+    if hit is None:
         return ""
+    best_mod, best_type = hit
 
     mod_name = best_mod.get("Name") or "<unknown-module>"
     ns = best_type.get("Namespace") or ""
@@ -303,58 +884,62 @@ def build_type_outline(project: Dict[str, Any], last_user: str) -> str:
     return "\n".join(lines)
 
 
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
 def fallback_keywords(text: str) -> List[str]:
     """Simple local keyword extractor used if OpenAI is unavailable."""
-    tokens = [
-        t.strip(".,;:()[]{}<>\"'").lower()
-        for t in text.split()
-        if t.strip()
-    ]
-    seen = set()
-    keywords: List[str] = []
-    for t in tokens:
-        if t and t not in seen:
-            seen.add(t)
-            keywords.append(t)
-    return keywords[:8]
+    # finditer runs the tokenization in C and dict.fromkeys gives an
+    # order-preserving dedup, replacing the per-token strip/lower loop.
+    tokens = (m.group(0).lower() for m in _TOKEN_RE.finditer(text))
+    return list(dict.fromkeys(tokens))[:8]
 
 
-def build_keyword_paths(keywords: List[str], last_user: str) -> List[str]:
+def build_keyword_paths(keywords: Any, last_user: str) -> List[str]:
     """
-    Turn a flat list of keywords into path-style phrases.
+    Turn a raw keyword list from the model into path-style phrases.
 
-    If the model already returns phrases (items containing spaces), they are
-    kept as-is. If it returns only single tokens like
+    Accepts the list as-is (non-strings and blanks are dropped here, in the
+    same pass that inspects each keyword, instead of a separate cleanup
+    loop). If the model already returns phrases (items containing spaces),
+    they are kept as-is. If it returns only single tokens like
     ['Player', 'Health', 'AttackSpeed'], we synthesize paths such as:
       ['Player Health', 'Player AttackSpeed']
     using the first capitalized token (or first token) as the root.
     """
-    if not keywords:
-        return []
-
-    # If we already have phrases, assume the model followed the contract.
-    if any(" " in kw for kw in keywords):
-        return keywords
-
-    # Pick a root token: first capitalized keyword, otherwise the first one.
+    # One fused pass: strip/filter, spot phrases, and pick the root token
+    # (first capitalized keyword) together.
+    cleaned: List[str] = []
+    has_phrase = False
     root = None
-    for kw in keywords:
-        if kw and kw[0].isupper():
+    for kw in keywords or ():
+        if not isinstance(kw, str):
+            continue
+        kw = kw.strip()
+        if not kw:
+            continue
+        cleaned.append(kw)
+        if not has_phrase and " " in kw:
+            has_phrase = True
+        if root is None and kw[0].isupper():
             root = kw
-            break
-    if root is None:
-        root = keywords[0]
 
-    attrs = [k for k in keywords if k != root]
+    if not cleaned:
+        return []
 
-    paths: List[str] = []
+    # If we already have phrases, assume the model followed the contract.
+    if has_phrase:
+        return cleaned
 
-    # Always keep a broad path for the root alone.
-    paths.append(root)
+    if root is None:
+        root = cleaned[0]
 
-    # Add root+attribute paths like "Player Health", "Player AttackSpeed".
-    for attr in attrs:
-        paths.append(f"{root} {attr}")
+    # Keep a broad path for the root alone, then root+attribute paths
+    # like "Player Health", "Player AttackSpeed".
+    paths = [root]
+    for attr in cleaned:
+        if attr != root:
+            paths.append(f"{root} {attr}")
 
     return paths
 
@@ -372,80 +957,223 @@ def build_paths_from_tree(tree: List[Dict[str, Any]]) -> List[str]:
     if not tree:
         return []
 
-    # Normalize structure and filter out invalid entries.
-    nodes: List[Dict[str, Any]] = []
+    # One pass over the raw tree: validate each entry and fill the
+    # adjacency map, parent map, and per-keyword lowered forms together
+    # instead of building an intermediate normalized node list first.
+    children: Dict[Any, List[str]] = {}
+    parent_of: Dict[str, Any] = {}
+    lower_of: Dict[str, str] = {}
+    order: List[str] = []
+    children_setdefault = children.setdefault
     for n in tree:
         if not isinstance(n, dict):
             continue
         kw = n.get("keyword")
-        if not isinstance(kw, str) or not kw.strip():
+        if not isinstance(kw, str):
+            continue
+        kw = kw.strip()
+        if not kw:
             continue
         parent = n.get("parent")
         if parent is not None and not isinstance(parent, str):
             parent = None
-        nodes.append({"keyword": kw.strip(), "parent": parent})
+        children_setdefault(parent, []).append(kw)
+        parent_of[kw] = parent
+        lower_of[kw] = kw.lower()
+        order.append(kw)
 
-    if not nodes:
+    if not order:
         return []
 
-    # Build adjacency map: parent keyword -> list of child keywords.
-    children: Dict[Any, List[str]] = {}
-    parent_of: Dict[str, Any] = {}
-    for n in nodes:
-        parent = n["parent"]
-        kw = n["keyword"]
-        children.setdefault(parent, []).append(kw)
-        parent_of[kw] = parent
-
     roots = children.get(None, []) + children.get("", [])
     if not roots:
         # Fallback: treat all nodes as roots.
-        roots = [n["keyword"] for n in nodes]
+        roots = order
 
     paths: List[str] = []
-
-    def dfs(current_kw: str, acc: List[str], parent_kw: Any) -> None:
-        # If the child keyword contains the parent keyword as a prefix
-        # (e.g., PlayerAttack / AttackSpeed), remove the parent portion
-        # from the child token to avoid duplicated words in the path.
-        display_kw = current_kw
-        if isinstance(parent_kw, str) and parent_kw:
-            lower_parent = parent_kw.lower()
-            lower_child = current_kw.lower()
-            if lower_child.startswith(lower_parent):
-                trimmed = current_kw[len(parent_kw) :].lstrip("_ .")
-                if trimmed:
-                    display_kw = trimmed
-
-        acc.append(display_kw)
-        kids = children.get(current_kw)
-        if not kids:
-            paths.append(" ".join(acc))
-        else:
-            for child in kids:
-                dfs(child, acc[:], current_kw)
-
+    acc: List[str] = []
+    paths_append = paths.append
+
+    # A real path visits each keyword at most once, so any branch deeper
+    # than the node count means the parent links form a cycle (the tree
+    # comes from untrusted LLM output). Stop descending there and emit the
+    # path as-is instead of looping forever.
+    max_depth = len(order)
+
+    # Iterative DFS over an explicit stack sharing one accumulator list:
+    # truncating back to the node's depth on each visit replaces the
+    # acc[:] copy the recursive version made for every branch.
     for root in roots:
-        dfs(root, [], parent_of.get(root))
+        stack = [(root, parent_of.get(root), 0)]
+        while stack:
+            current_kw, parent_kw, depth = stack.pop()
+            del acc[depth:]
+
+            # If the child keyword contains the parent keyword as a prefix
+            # (e.g., PlayerAttack / AttackSpeed), remove the parent portion
+            # from the child token to avoid duplicated words in the path.
+            display_kw = current_kw
+            if isinstance(parent_kw, str) and parent_kw:
+                lower_parent = lower_of.get(parent_kw) or parent_kw.lower()
+                lower_child = lower_of.get(current_kw) or current_kw.lower()
+                if lower_child.startswith(lower_parent):
+                    trimmed = current_kw[len(parent_kw) :].lstrip("_ .")
+                    if trimmed:
+                        display_kw = trimmed
+
+            acc.append(display_kw)
+            kids = children.get(current_kw)
+            if not kids or depth + 1 >= max_depth:
+                paths_append(" ".join(acc))
+            else:
+                # Reversed so the stack pops children in their original order.
+                for child in reversed(kids):
+                    stack.append((child, current_kw, depth + 1))
 
     return paths
 
 
-def _strip_markdown_fence(text: str) -> str:
-    """Strip a leading/trailing ``` code fence if present."""
-    stripped = text.strip()
-    if not stripped.startswith("```"):
-        return stripped
+def _parse_fenced_json(text: str) -> Any:
+    """
+    Parse the first JSON value out of model output that may be wrapped
+    in a markdown code fence, in a single scan.
+
+    ``raw_decode`` returns ``(obj, end_index)`` and ignores anything after
+    the value (such as a closing ``` fence), so the only preprocessing
+    needed is skipping an optional leading ```json line — no intermediate
+    stripped-string allocations.
+    """
+    i = 0
+    n = len(text)
+    while i < n and text[i] in " \t\r\n":
+        i += 1
+    if text.startswith("```", i):
+        nl = text.find("\n", i)
+        i = nl + 1 if nl != -1 else i + 3
+        while i < n and text[i] in " \t\r\n":
+            i += 1
+    obj, _end = _JSON_DECODER.raw_decode(text, i)
+    return obj
+
+
+def _clean_strs(seq: Any) -> List[str]:
+    """
+    Normalize a model-returned list: keep only non-empty strings, stripped.
 
-    # Remove first fence line
-    first_newline = stripped.find("\n")
-    if first_newline != -1:
-        stripped = stripped[first_newline + 1 :]
-    # Remove trailing fence
-    end = stripped.rfind("```")
-    if end != -1:
-        stripped = stripped[:end]
-    return stripped.strip()
+    map(str.strip, ...) over a pre-filtered generator keeps the per-element
+    work in C instead of the strip/check/append dance at each call site.
+    """
+    if not isinstance(seq, list):
+        return []
+    return [s for s in map(str.strip, (x for x in seq if isinstance(x, str))) if s]
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding() -> Any:
+    """Tokenizer used for overview truncation, or None without tiktoken."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Fit text into a token budget by keeping the head and tail and eliding
+    the middle.
+
+    Prefill latency and cost scale with prompt tokens, so a huge project
+    overview gets squeezed before it reaches the model; the first and last
+    entries survive, which is where the distinctive module names tend to
+    live. Uses tiktoken when installed, otherwise a ~4 chars/token estimate
+    cut on line boundaries.
+    """
+    if max_tokens <= 0:
+        return text
+    enc = _token_encoding()
+    if enc is not None:
+        tokens = enc.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        half = max_tokens // 2
+        omitted = len(tokens) - 2 * half
+        return (
+            enc.decode(tokens[:half])
+            + f"\n... <{omitted} tokens omitted> ...\n"
+            + enc.decode(tokens[-half:])
+        )
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    head, _, _ = text[: max_chars // 2].rpartition("\n")
+    _, _, tail = text[-(max_chars // 2):].partition("\n")
+    omitted = text.count("\n") - head.count("\n") - tail.count("\n") - 1
+    return head + f"\n... <{max(omitted, 1)} lines omitted> ...\n" + tail
+
+
+# System prompts are fixed per mode, so build them once at import time instead
+# of re-concatenating ~1 KB of literals on every call. Module-level constants
+# are also interned as single objects, which keeps repeated requests pointing
+# at byte-identical prompt strings.
+_SYSTEM_PROMPTS: Dict[str, str] = {
+    "file": (
+        "You are a Unity / C# reverse-engineering assistant integrated into dnSpy.\n"
+        "The user has opened a specific decompiled C# class or file in the dnSpy code editor\n"
+        "and is asking you to analyze that current class.\n"
+        "Your job is to:\n"
+        "  1) Explain in detail what this class does in the game's logic (gameplay, UI, systems, etc.).\n"
+        "  2) Highlight important methods, fields, properties, and events, and how they interact.\n"
+        "  3) Suggest concrete hooks or modification points that a modder or reverser might use.\n"
+        "  4) Propose short search keywords (type names, method names, namespaces, etc.) that dnSpy\n"
+        "     can use to search the rest of the project for related code.\n"
+        "Return ONLY a JSON object with the following shape and nothing else:\n"
+        "{\n"
+        '  \"assistant_message\": \"free-form answer text\",\n'
+        '  \"search_keywords\": [\"keyword1\", \"keyword2\", ...],\n'
+        '  \"excluded_modules\": [\"module-substring-1\", \"module-substring-2\", ...],\n'
+        '  \"keywords\": [\n'
+        '    {\"keyword\": \"Player\", \"parent\": null, \"layer\": 0},\n'
+        '    {\"keyword\": \"Health\", \"parent\": \"Player\", \"layer\": 1},\n'
+        '    {\"keyword\": \"Attack\", \"parent\": \"Player\", \"layer\": 1},\n'
+        '    {\"keyword\": \"Power\", \"parent\": \"Attack\", \"layer\": 2}\n'
+        "  ]\n"
+        "}\n"
+        "When suggesting search keywords, prefer ones that include the class name and the most\n"
+        "important methods or properties from the provided code so dnSpy's search can easily\n"
+        "jump to related logic.\n"
+    ),
+    "chat": (
+        "You are a Unity game reverse-engineering assistant integrated into dnSpy.\n"
+        "The user is inspecting a Unity or .NET game and asking about types, methods, "
+        "assemblies, and modules in the loaded project.\n"
+        "Your job is to:\n"
+        "  1) Explain the likely game logic or behavior in clear language.\n"
+        "  2) Propose short search keywords (type names, method names, namespaces, etc.) "
+        "     that dnSpy can use to search the project.\n"
+        "  3) Suggest module name patterns that should be excluded from search results "
+        "     (for example engine/framework/system/UI assemblies) when they are not "
+        "     relevant to gameplay code.\n"
+        "Return ONLY a JSON object with the following shape and nothing else:\n"
+        "{\n"
+        '  \"assistant_message\": \"free-form answer text\",\n'
+        '  \"search_keywords\": [\"keyword1\", \"keyword2\", ...],\n'
+        '  \"excluded_modules\": [\"module-substring-1\", \"module-substring-2\", ...],\n'
+        '  \"keywords\": [\n'
+        '    {\"keyword\": \"Player\", \"parent\": null, \"layer\": 0},\n'
+        '    {\"keyword\": \"Health\", \"parent\": \"Player\", \"layer\": 1},\n'
+        '    {\"keyword\": \"Attack\", \"parent\": \"Player\", \"layer\": 1},\n'
+        '    {\"keyword\": \"Power\", \"parent\": \"Attack\", \"layer\": 2}\n'
+        "  ]\n"
+        "}\n"
+        "When the user is asking specifically about gameplay or mission logic, prefer to "
+        "exclude generic system/framework/UI modules such as those containing names like:\n"
+        "  \"System\", \"mscorlib\", \"UnityEngine\", \"UnityEditor\", \"UnityEngine.UI\", "
+        "\"TMPro\", \"TextMeshPro\", \"Newtonsoft\", \"DOTween\", or obvious plugin names.\n"
+        "Use short substrings that will match the module names, not full paths.\n"
+    ),
+}
 
 
 def call_openai_structured(last_user: str, project_overview: str, *, mode: str = "chat") -> Dict[str, Any]:
@@ -480,7 +1208,13 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             # doesn't have to reason about "current working directory".
             base_dir = os.path.dirname(__file__)
             temp_prompt_path = os.path.join(base_dir, "temp_prompts.md")
-            result_json_path = os.path.join(base_dir, "claude_automation_result.json")
+            # Unique per-run result path: no pre-delete of a shared file is
+            # needed, and a leftover from a crashed run can never be read
+            # back as this run's result.
+            result_json_path = os.path.join(
+                base_dir,
+                f"claude_automation_result_{os.getpid()}_{int(time.time() * 1000)}.json",
+            )
             result_json_display = result_json_path.replace("\\", "/")
 
             system_prompt = (
@@ -536,11 +1270,8 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             # Log a short preview of the combined prompt so we can understand
             # what context was sent without dumping the entire file.
             try:
-                preview = full_prompt
-                if len(preview) > 400:
-                    preview = preview[:400] + "... (truncated)"
-                log(f"_call_claude_cli_automation(): full_prompt preview: {preview!r}")
-            except Exception as ex: 
+                log("_call_claude_cli_automation(): full_prompt preview: " + _short(full_prompt, 400))
+            except Exception as ex:
                 log(f"_call_claude_cli_automation(): failed to log full_prompt preview: {ex!r}")
 
             # To avoid extremely long -p command-line arguments and give Claude
@@ -554,15 +1285,6 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             except Exception as ex:
                 log(f"_call_claude_cli_automation(): failed to write {temp_prompt_path}: {ex!r}")
 
-            # Ensure we start from a clean result file so we don't accidentally
-            # read stale data if Claude fails to write a new result.
-            try:
-                if os.path.exists(result_json_path):
-                    os.remove(result_json_path)
-                    log(f"_call_claude_cli_automation(): deleted existing result file {result_json_path}")
-            except Exception as ex:
-                log(f"_call_claude_cli_automation(): failed to delete old result file {result_json_path}: {ex!r}")
-
             short_prompt = (
                 f"The file 'temp_prompts.md' in the current working directory "
                 f"Carefully read that file, then follow its instructions."
@@ -572,59 +1294,65 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             # in this Python process before invoking the CLI.
             _ensure_claude_env()
 
-            # Resolve the Claude CLI executable name: allow overriding via
-            # CLAUDE_CLI but invoke it through the shell so that any wrapper
-            # scripts (eg. claude.CMD) and PATH logic behave exactly as in an
-            # interactive terminal.
+            # Resolve the Claude CLI executable: allow overriding via
+            # CLAUDE_CLI, and let shutil.which find wrapper scripts
+            # (eg. claude.CMD) on PATH so no shell is needed to launch them.
             env_cli = os.getenv("CLAUDE_CLI")
             path_env = os.getenv("PATH", "")
-            which_claude = shutil.which("claude")
-            cli_exe = env_cli or "claude"
+            cli_name = env_cli or "claude"
+            cli_exe = shutil.which(cli_name) or cli_name
 
             log(
                 "call_openai_structured(): invoking Claude CLI in automation mode "
-                f"using command prefix '{cli_exe}', PATH length={len(path_env)}, "
-                f"shutil.which('claude')={which_claude!r}, CLAUDE_CLI={env_cli!r}."
-            )
-
-            # Escape any double quotes so the prompt can be passed as a single
-            # argument in a shell command string.
-            escaped_prompt = short_prompt.replace('"', '\\"')
-            cmd = (
-                f'{cli_exe} -p "{escaped_prompt}" '
-                "--dangerously-skip-permissions --output-format json --model claude-sonnet-4-5-20250929"
+                f"using executable '{cli_exe}', PATH length={len(path_env)}, "
+                f"CLAUDE_CLI={env_cli!r}."
             )
-            log(f"call_openai_structured(): Claude CLI full command: {cmd}")
 
-            # Ensure localhost calls to the automation server do not go through
-            # any configured HTTP proxy.
+            # Argv list, no shell: skips the cmd.exe/sh startup and parse per
+            # call and removes prompt-quoting pitfalls entirely.
+            argv = [
+                cli_exe,
+                "-p",
+                short_prompt,
+                "--dangerously-skip-permissions",
+                "--output-format",
+                "json",
+                "--model",
+                "claude-sonnet-4-5-20250929",
+            ]
+            log(f"call_openai_structured(): Claude CLI argv: {argv}")
+
+            # Tee Claude's stdout straight to disk instead of buffering the
+            # whole stream in this process: the kernel writes the pipe data
+            # to CLAUDE_STDOUT_FILE as it arrives, and we read back only
+            # what each path below actually needs. Localhost calls to the
+            # automation server must not go through any configured proxy.
             with _without_http_proxy():
-                proc = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    shell=True,
-                    cwd=base_dir,
-                    encoding="utf-8",
-                    errors="replace",
-                )
+                with open(CLAUDE_STDOUT_FILE, "wb") as stdout_fh:
+                    proc = subprocess.run(
+                        argv,
+                        stdout=stdout_fh,
+                        stderr=subprocess.PIPE,
+                        cwd=base_dir,
+                    )
 
             log(f"call_openai_structured(): Claude CLI exited with code {proc.returncode}.")
-            stderr_text = proc.stderr.strip() if proc.stderr else ""
+            stderr_text = proc.stderr.decode("utf-8", "replace").strip() if proc.stderr else ""
             if stderr_text:
                 log(f"call_openai_structured(): Claude CLI stderr: {stderr_text}")
 
-            raw_output = proc.stdout or ""
             try:
-                with open(CLAUDE_STDOUT_FILE, "w", encoding="utf-8", errors="replace") as f:
-                    f.write(raw_output)
-                log(f"call_openai_structured(): wrote full Claude stdout to {CLAUDE_STDOUT_FILE}")
+                with open(CLAUDE_STDOUT_FILE, "rb") as f:
+                    preview_bytes = f.read(4000)
+                    truncated = bool(f.read(1))
+                preview = preview_bytes.decode("utf-8", "replace")
+                if truncated:
+                    preview += "... (truncated)"
+                # Plain concatenation: repr() would copy and escape the whole
+                # multi-KB preview just to write it to a file.
+                log("call_openai_structured(): Claude CLI stdout preview: " + preview)
             except Exception as ex:
-                log(f"call_openai_structured(): failed to write {CLAUDE_STDOUT_FILE}: {ex!r}")
-            preview = raw_output
-            if len(preview) > 4000:
-                preview = preview[:4000] + "... (truncated)"
-            log(f"call_openai_structured(): Claude CLI stdout preview: {preview!r}")
+                log(f"call_openai_structured(): failed to read {CLAUDE_STDOUT_FILE}: {ex!r}")
 
             if proc.returncode != 0:
                 raise RuntimeError(f"Claude CLI failed with exit code {proc.returncode}")
@@ -639,22 +1367,28 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
                         file_text = f.read()
 
                     try:
-                        data = json.loads(file_text)
+                        data = _loads(file_text)
                     except Exception as ex:
                         raise RuntimeError(f"Failed to parse Claude result JSON from {result_json_path}: {ex!r}")
                 finally:
-                    # Best-effort cleanup of the result file so each run starts fresh.
+                    # Best-effort cleanup of the per-run result file.
                     try:
-                        if os.path.exists(result_json_path):
-                            os.remove(result_json_path)
-                            log(f"_call_claude_cli_automation(): deleted result file {result_json_path}")
-                    except Exception as ex:
-                        log(f"_call_claude_cli_automation(): failed to delete result file {result_json_path}: {ex!r}")
+                        os.unlink(result_json_path)
+                        log(f"_call_claude_cli_automation(): deleted result file {result_json_path}")
+                    except OSError:
+                        pass
             else:
                 log(
                     f"_call_claude_cli_automation(): result JSON file {result_json_path} "
                     "not found; falling back to parsing stdout."
                 )
+                # Only this fallback path needs the full stdout; the common
+                # result-file path never decodes it.
+                try:
+                    with open(CLAUDE_STDOUT_FILE, "r", encoding="utf-8", errors="replace") as f:
+                        raw_output = f.read()
+                except Exception:
+                    raw_output = ""
                 output = raw_output.strip()
                 if not output:
                     raise RuntimeError(
@@ -662,13 +1396,15 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
                         "cannot obtain automation result."
                     )
 
-                text = _strip_markdown_fence(output)
-
                 try:
-                    obj = json.loads(text)
-                    if isinstance(obj, dict) and "result" in obj and isinstance(obj["result"], str):
-                        inner = _strip_markdown_fence(obj["result"])
-                        data = json.loads(inner)
+                    # Envelope and inner payload are each parsed exactly once:
+                    # _parse_fenced_json skips an optional fence and decodes in
+                    # a single scan, so the stdout bytes aren't resliced by a
+                    # separate fence-strip pass before each parse.
+                    obj = _parse_fenced_json(output)
+                    result = obj.get("result") if isinstance(obj, dict) else None
+                    if isinstance(result, str):
+                        data = _parse_fenced_json(result)
                     else:
                         data = obj
                 except Exception:
@@ -695,27 +1431,8 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
 
         # Normalize Claude's response into the expected shape.
         assistant_message = data.get("AssistantMessage") or ""
-        search_keywords = data.get("SearchKeywords") or []
-        excluded_modules = data.get("ExcludedModules") or []
-
-        if not isinstance(search_keywords, list):
-            search_keywords = []
-        if not isinstance(excluded_modules, list):
-            excluded_modules = []
-
-        norm_search: List[str] = []
-        for kw in search_keywords:
-            if isinstance(kw, str):
-                kw = kw.strip()
-                if kw:
-                    norm_search.append(kw)
-
-        norm_excluded: List[str] = []
-        for m in excluded_modules:
-            if isinstance(m, str):
-                m = m.strip()
-                if m:
-                    norm_excluded.append(m)
+        norm_search = _clean_strs(data.get("SearchKeywords"))
+        norm_excluded = _clean_strs(data.get("ExcludedModules"))
 
         return {
             "AssistantMessage": assistant_message,
@@ -741,95 +1458,54 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             "ExcludedModules": [],
         }
 
+    # Persistent on-disk cache; automation mode never reaches here (it
+    # depends on live server state), and POE_NO_CACHE=1 opts out.
+    use_cache = os.getenv("POE_NO_CACHE", "").lower() not in ("1", "true", "yes", "y")
+    cache_key = _cache_key(mode, project_overview, last_user) if use_cache else ""
+    sem_cache = _semantic_cache() if use_cache else None
+    sem_partition = _semantic_partition(mode, project_overview) if sem_cache is not None else ""
+    if use_cache:
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            log("call_openai_structured(): on-disk cache hit, skipping LLM call")
+            return cached
+        if sem_cache is not None:
+            cached = sem_cache.get(last_user, sem_partition)
+            if cached is not None:
+                log("call_openai_structured(): semantic cache hit, skipping LLM call")
+                return cached
+
     api_key = os.getenv("POE_API_KEY") or os.getenv("OPENAI_API_KEY") or DEFAULT_POE_API_KEY
     if not api_key:
         raise RuntimeError("POE_API_KEY/OPENAI_API_KEY is not set")
 
-    # Force all HTTP(S) traffic through the local proxy, ignoring
-    # any existing proxy-related environment variables.
-    proxy_url = "http://127.0.0.1:2805"
-    os.environ["HTTP_PROXY"] = proxy_url
-    os.environ["http_proxy"] = proxy_url
-    os.environ["HTTPS_PROXY"] = proxy_url
-    os.environ["https_proxy"] = proxy_url
+    base_url = os.getenv("POE_BASE_URL", "https://api.poe.com/v1")
 
-    import openai  # type: ignore
-
-    client = openai.OpenAI(  # type: ignore[attr-defined]
-        api_key=api_key,
-        base_url=os.getenv("POE_BASE_URL", "https://api.poe.com/v1"),
+    # POE_DIRECT_HTTP=1 skips the OpenAI SDK entirely and POSTs the same
+    # payload over a shared httpx pool; see _direct_chat_completion().
+    use_direct = (
+        httpx is not None
+        and os.getenv("POE_DIRECT_HTTP", "").lower() in ("1", "true", "yes", "y")
     )
 
-    # Allow overriding the network timeout from the environment,
-    # but keep it reasonably small so dnSpy won't appear frozen
-    # if the Poe/OpenAI endpoint is unreachable.
-    try:
-        # Default timeout (seconds) for Poe/OpenAI calls.
-        # You can override this with POE_TIMEOUT_SECONDS.
-        timeout_seconds = float(os.getenv("POE_TIMEOUT_SECONDS", "60"))
-    except Exception:
-        timeout_seconds = 60.0
+    # Force all HTTP(S) traffic through the local proxy, ignoring
+    # any existing proxy-related environment variables. The client (and
+    # its connection pool) is cached, so repeated calls with the same
+    # key/endpoint reuse the existing TCP/TLS sessions.
+    client = None if use_direct else _get_openai_client(api_key, base_url, _POE_PROXY_URL)
 
     log(f"call_openai_structured(): mode={mode}, len(last_user)={len(last_user)}, "
-        f"project_overview_len={len(project_overview)}, timeout={timeout_seconds}")
+        f"project_overview_len={len(project_overview)}, timeout={_poe_timeout()!r}")
 
-    if mode == "file":
-        system_prompt = (
-            "You are a Unity / C# reverse-engineering assistant integrated into dnSpy.\n"
-            "The user has opened a specific decompiled C# class or file in the dnSpy code editor\n"
-            "and is asking you to analyze that current class.\n"
-            "Your job is to:\n"
-            "  1) Explain in detail what this class does in the game's logic (gameplay, UI, systems, etc.).\n"
-            "  2) Highlight important methods, fields, properties, and events, and how they interact.\n"
-            "  3) Suggest concrete hooks or modification points that a modder or reverser might use.\n"
-            "  4) Propose short search keywords (type names, method names, namespaces, etc.) that dnSpy\n"
-            "     can use to search the rest of the project for related code.\n"
-            "Return ONLY a JSON object with the following shape and nothing else:\n"
-            "{\n"
-            '  \"assistant_message\": \"free-form answer text\",\n'
-            '  \"search_keywords\": [\"keyword1\", \"keyword2\", ...],\n'
-            '  \"excluded_modules\": [\"module-substring-1\", \"module-substring-2\", ...],\n'
-            '  \"keywords\": [\n'
-            '    {\"keyword\": \"Player\", \"parent\": null, \"layer\": 0},\n'
-            '    {\"keyword\": \"Health\", \"parent\": \"Player\", \"layer\": 1},\n'
-            '    {\"keyword\": \"Attack\", \"parent\": \"Player\", \"layer\": 1},\n'
-            '    {\"keyword\": \"Power\", \"parent\": \"Attack\", \"layer\": 2}\n'
-            "  ]\n"
-            "}\n"
-            "When suggesting search keywords, prefer ones that include the class name and the most\n"
-            "important methods or properties from the provided code so dnSpy's search can easily\n"
-            "jump to related logic.\n"
-        )
-    else:
-        system_prompt = (
-            "You are a Unity game reverse-engineering assistant integrated into dnSpy.\n"
-            "The user is inspecting a Unity or .NET game and asking about types, methods, "
-            "assemblies, and modules in the loaded project.\n"
-            "Your job is to:\n"
-            "  1) Explain the likely game logic or behavior in clear language.\n"
-            "  2) Propose short search keywords (type names, method names, namespaces, etc.) "
-            "     that dnSpy can use to search the project.\n"
-            "  3) Suggest module name patterns that should be excluded from search results "
-            "     (for example engine/framework/system/UI assemblies) when they are not "
-            "     relevant to gameplay code.\n"
-            "Return ONLY a JSON object with the following shape and nothing else:\n"
-            "{\n"
-            '  \"assistant_message\": \"free-form answer text\",\n'
-            '  \"search_keywords\": [\"keyword1\", \"keyword2\", ...],\n'
-            '  \"excluded_modules\": [\"module-substring-1\", \"module-substring-2\", ...],\n'
-            '  \"keywords\": [\n'
-            '    {\"keyword\": \"Player\", \"parent\": null, \"layer\": 0},\n'
-            '    {\"keyword\": \"Health\", \"parent\": \"Player\", \"layer\": 1},\n'
-            '    {\"keyword\": \"Attack\", \"parent\": \"Player\", \"layer\": 1},\n'
-            '    {\"keyword\": \"Power\", \"parent\": \"Attack\", \"layer\": 2}\n'
-            "  ]\n"
-            "}\n"
-            "When the user is asking specifically about gameplay or mission logic, prefer to "
-            "exclude generic system/framework/UI modules such as those containing names like:\n"
-            "  \"System\", \"mscorlib\", \"UnityEngine\", \"UnityEditor\", \"UnityEngine.UI\", "
-            "\"TMPro\", \"TextMeshPro\", \"Newtonsoft\", \"DOTween\", or obvious plugin names.\n"
-            "Use short substrings that will match the module names, not full paths.\n"
-        )
+    system_prompt = _SYSTEM_PROMPTS.get(mode, _SYSTEM_PROMPTS["chat"])
+
+    # Keep the overview inside a token budget; prefill dominates latency
+    # on large Unity projects. POE_MAX_OVERVIEW_TOKENS=0 disables.
+    try:
+        max_overview_tokens = int(os.getenv("POE_MAX_OVERVIEW_TOKENS", "4000"))
+    except Exception:
+        max_overview_tokens = 4000
+    project_overview = _truncate_to_tokens(project_overview, max_overview_tokens)
 
     user_prompt = (
         "Project overview (truncated):\n"
@@ -837,21 +1513,94 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
         "User question and context:\n"
         f"{last_user}\n"
     )
+    user_content: Any = user_prompt
+    if len(project_overview) >= 4096:
+        # A large overview is stable across turns within a session; split it
+        # into its own cacheable block so follow-up questions reuse the
+        # server-side prefix instead of re-prefilling the whole overview.
+        # ~4 chars/token, so 4096 chars clears Anthropic's 1024-token minimum.
+        user_content = [
+            {
+                "type": "text",
+                "text": "Project overview (truncated):\n" f"{project_overview}\n",
+                "cache_control": {"type": "ephemeral"},
+            },
+            {
+                "type": "text",
+                "text": "\nUser question and context:\n" f"{last_user}\n",
+            },
+        ]
 
     # Write minimal progress information to stderr so the host can
     # surface it in the LLM log window when troubleshooting.
     log("call_openai_structured(): calling Poe/OpenAI chat.completions.create()")
-    print("[llm-backend] Calling Poe/OpenAI for structured response...", file=sys.stderr, flush=True)
-
-    try:
-        chat = client.chat.completions.create(
-            model=os.getenv("POE_MODEL", "claude-sonnet-4.5"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
+    print("[llm-backend] Calling Poe/OpenAI for structured response...", file=sys.stderr)
+
+    model = os.getenv("POE_MODEL", "claude-sonnet-4.5")
+    messages = [
+        {
+            # The system prompt is identical on every turn, so mark it
+            # for Anthropic prompt caching: cached hits skip re-prefilling
+            # the prompt server-side. Endpoints that don't understand
+            # cache_control simply ignore the field.
+            "role": "system",
+            "content": [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
             ],
-            timeout=timeout_seconds,
+        },
+        {"role": "user", "content": user_content},
+    ]
+
+    def _attempt() -> str:
+        if use_direct:
+            started = time.time()
+            raw = _direct_chat_completion(api_key, base_url, model, messages)
+            log(f"call_openai_structured(): direct HTTP completion in {time.time() - started:.2f}s")
+            return raw
+        # Stream the completion: chunks are accumulated as they arrive, so
+        # the time to the first token shows up in the log (useful when a
+        # call feels slow) and a mid-stream stall fails at the read that
+        # stalled instead of after the whole-response timeout.
+        stream = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"},
+            stream=True,
         )
+        parts: List[str] = []
+        started = time.time()
+        first_token_logged = False
+        for chunk in stream:
+            choices = getattr(chunk, "choices", None)
+            if not choices:
+                continue
+            delta = getattr(choices[0].delta, "content", None)
+            if delta:
+                if not first_token_logged:
+                    log(f"call_openai_structured(): first streamed token after {time.time() - started:.2f}s")
+                    first_token_logged = True
+                parts.append(delta)
+        return "".join(parts)
+
+    try:
+        # Up to two fast retries on transient failures (timeouts, 429, 5xx)
+        # before degrading: a tail-latency blip costs a short backoff
+        # instead of a whole turn of heuristic-quality results.
+        for attempt in range(3):
+            try:
+                raw = _attempt()
+                break
+            except Exception as ex:
+                if attempt >= 2 or not _is_retryable(ex):
+                    raise
+                delay = min(2 ** attempt, 4) + random.random() * 0.5
+                log(f"call_openai_structured(): transient failure ({ex!r}), "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 2}/3)")
+                time.sleep(delay)
     except Exception as ex:
         log(f"call_openai_structured(): OpenAI call failed: {ex!r}, falling back to offline heuristic.")
         keywords = fallback_keywords(last_user)
@@ -866,58 +1615,109 @@ def call_openai_structured(last_user: str, project_overview: str, *, mode: str =
             "ExcludedModules": [],
         }
 
-    content = chat.choices[0].message.content
-    if isinstance(content, str):
-        raw = content
-    else:
-        # Newer SDKs may return a list of content parts
-        raw = "".join(getattr(part, "text", "") for part in content)  # type: ignore[assignment]
-
-    raw = _strip_markdown_fence(raw)
-
     log(f"call_openai_structured(): OpenAI response length={len(raw)} characters")
-    data = json.loads(raw)
-    assistant_message = data.get("assistant_message") or ""
-    search_keywords = data.get("search_keywords") or []
-    excluded_modules = data.get("excluded_modules") or []
-    keyword_tree = data.get("keywords") or []
-
-    if not isinstance(search_keywords, list):
-        search_keywords = []
-    if not isinstance(excluded_modules, list):
-        excluded_modules = []
-
-    # Normalize keywords and excluded module patterns to strings.
-    normalized_keywords: List[str] = []
-    for kw in search_keywords:
-        if isinstance(kw, str):
-            kw = kw.strip()
-            if kw:
-                normalized_keywords.append(kw)
+    parsed = None
+    if _LLM_DECODER is not None:
+        # Fast path: decode and schema-validate in one pass. A reply that
+        # doesn't match the schema (or is markdown-fenced) raises and falls
+        # through to the lenient dict-based path below.
+        try:
+            parsed = _LLM_DECODER.decode(raw)
+        except Exception:
+            parsed = None
+    if parsed is not None:
+        assistant_message = parsed.assistant_message
+        keyword_tree = msgspec.to_builtins(parsed.keywords)
+        raw_keywords: Any = parsed.search_keywords
+        # Types are already validated; only stripping/empty-filtering remains.
+        normalized_excluded = [s for s in map(str.strip, parsed.excluded_modules) if s]
+    else:
+        # Bare JSON replies (the common case) go straight through the fast
+        # _loads shim; anything wrapped in a markdown fence falls back to the
+        # single-scan fence-tolerant parse.
+        try:
+            data = _loads(raw)
+        except Exception:
+            data = _parse_fenced_json(raw)
+        assistant_message = data.get("assistant_message") or ""
+        keyword_tree = data.get("keywords") or []
+        raw_keywords = data.get("search_keywords")
+        normalized_excluded = _clean_strs(data.get("excluded_modules"))
 
     # Prefer explicit keyword tree paths if provided.
     paths_from_tree = build_paths_from_tree(keyword_tree) if keyword_tree else []
     if paths_from_tree:
         normalized_keywords = paths_from_tree
     else:
-        # Convert flat keywords into path-style phrases when needed.
-        normalized_keywords = build_keyword_paths(normalized_keywords, last_user)
-
-    normalized_excluded: List[str] = []
-    for m in excluded_modules:
-        if isinstance(m, str):
-            m = m.strip()
-            if m:
-                normalized_excluded.append(m)
+        # Convert flat keywords into path-style phrases; the raw list goes
+        # in directly, since normalization is fused into the path builder.
+        normalized_keywords = build_keyword_paths(raw_keywords, last_user)
 
     log("call_openai_structured(): building normalized response")
-    print("[llm-backend] Poe/OpenAI call succeeded, building response JSON.", file=sys.stderr, flush=True)
+    print("[llm-backend] Poe/OpenAI call succeeded, building response JSON.", file=sys.stderr)
 
-    return {
+    resp = {
         "AssistantMessage": assistant_message,
         "SearchKeywords": normalized_keywords,
         "ExcludedModules": normalized_excluded,
     }
+    if use_cache:
+        _cache_set(cache_key, resp)
+        if sem_cache is not None:
+            sem_cache.put(last_user, resp, sem_partition)
+    return resp
+
+
+@functools.lru_cache(maxsize=1)
+def _automation_http() -> Any:
+    """
+    Pooled keep-alive client for localhost automation calls.
+
+    trust_env=False replaces the proxy env-var juggling entirely, and the
+    keep-alive pool means k keyword searches reuse one TCP connection
+    instead of paying k handshakes. None when httpx is unavailable.
+    """
+    if httpx is None:
+        return None
+    return httpx.Client(
+        trust_env=False,
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=8),
+    )
+
+
+def _automation_get(url: str, timeout: float) -> bytes:
+    """GET a local automation endpoint, preferring the pooled client."""
+    client = _automation_http()
+    if client is not None:
+        return client.get(url, timeout=timeout).content
+    with _NO_PROXY_OPENER.open(url, timeout=timeout) as resp:
+        return resp.read()
+
+
+def _automation_post(url: str, payload: Any, timeout: float) -> Any:
+    """
+    POST JSON to a local automation endpoint, preferring the pooled client.
+
+    Returns the response bytes, or None when the endpoint answers 404
+    (an older server without the route) so callers can fall back.
+    """
+    body = _dumps(payload)
+    headers = {"Content-Type": "application/json"}
+    client = _automation_http()
+    if client is not None:
+        resp = client.post(url, content=body, headers=headers, timeout=timeout)
+        if resp.status_code == 404:
+            return None
+        return resp.content
+    request = urllib.request.Request(url, data=body, headers=headers)
+    try:
+        with _NO_PROXY_OPENER.open(request, timeout=timeout) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as ex:
+        if ex.code == 404:
+            return None
+        raise
 
 
 def ping_automation_server(base_url: str = "http://127.0.0.1:5015") -> str:
@@ -928,11 +1728,9 @@ def ping_automation_server(base_url: str = "http://127.0.0.1:5015") -> str:
     """
     url = base_url.rstrip("/") + "/health"
     try:
-        with _without_http_proxy():
-            with urllib.request.urlopen(url, timeout=2.0) as resp:
-                data = resp.read()
+        data = _automation_get(url, timeout=2.0)
         try:
-            payload = json.loads(data.decode("utf-8", "replace"))
+            payload = _loads(data)
         except Exception:
             payload = {}
         status = payload.get("status") or "unknown"
@@ -968,41 +1766,103 @@ def automation_search_with_keywords(
         return results
 
     base = base_url.rstrip("/")
-    for kw in keywords:
-        if len(results) >= max_total_results:
-            break
-        if not isinstance(kw, str):
-            continue
-        pattern = kw.strip()
-        if not pattern:
-            continue
+    # dict.fromkeys dedups in O(k) while keeping first-seen order, so a
+    # keyword the LLM emitted twice costs one server query instead of two.
+    patterns = list(dict.fromkeys(
+        kw.strip() for kw in keywords if isinstance(kw, str) and kw.strip()
+    ))
+    if not patterns:
+        return results
 
+    # LLM_AUTOMATION_BATCH=1 collapses the k per-keyword GETs into one POST
+    # to the server's batch endpoint; a 404 (older server) or any error
+    # falls back to the per-keyword fan-out below.
+    if os.getenv("LLM_AUTOMATION_BATCH", "").lower() in ("1", "true", "yes", "y"):
+        try:
+            url = f"{base}/api/search/broad/batch"
+            log(f"automation_search_with_keywords(): POST {url} with {len(patterns)} patterns")
+            data = _automation_post(
+                url,
+                {"patterns": patterns, "maxResults": max_results_per_keyword},
+                timeout=5.0,
+            )
+            if data is None:
+                log("automation_search_with_keywords(): batch endpoint not available (404), "
+                    "falling back to per-keyword GETs")
+            else:
+                payload = _loads(data)
+                if isinstance(payload, list):
+                    for entry in payload:
+                        if not isinstance(entry, dict):
+                            continue
+                        pattern = entry.get("pattern") or ""
+                        for item in entry.get("hits") or []:
+                            if isinstance(item, dict):
+                                item = dict(item)
+                                item["_pattern"] = pattern
+                                results.append(item)
+                                if len(results) >= max_total_results:
+                                    break
+                        if len(results) >= max_total_results:
+                            break
+                log(f"automation_search_with_keywords(): collected {len(results)} total hits "
+                    "via batch endpoint")
+                return results
+        except Exception as ex:  # pragma: no cover - best-effort only
+            log(f"automation_search_with_keywords(): batch search failed: {ex!r}, "
+                "falling back to per-keyword GETs")
+            results = []
+
+    def _fetch(pattern: str) -> List[Dict[str, Any]]:
         try:
             query = urllib.parse.urlencode(
                 {"pattern": pattern, "maxResults": str(max_results_per_keyword)}
             )
             url = f"{base}/api/search/broad?{query}"
             log(f"automation_search_with_keywords(): GET {url}")
-            with _without_http_proxy():
-                with urllib.request.urlopen(url, timeout=5.0) as resp:
-                    data = resp.read()
-            payload = json.loads(data.decode("utf-8", "replace"))
+            payload = _loads(_automation_get(url, timeout=5.0))
+            hits: List[Dict[str, Any]] = []
             if isinstance(payload, list):
                 for item in payload:
-                    if not isinstance(item, dict):
-                        continue
-                    item = dict(item)
-                    item["_pattern"] = pattern
-                    results.append(item)
-                    if len(results) >= max_total_results:
-                        break
+                    if isinstance(item, dict):
+                        item = dict(item)
+                        item["_pattern"] = pattern
+                        hits.append(item)
+            return hits
         except Exception as ex:  # pragma: no cover - best-effort only
             log(f"automation_search_with_keywords(): error querying automation server for pattern '{pattern}': {ex!r}")
+            return []
+
+    # Fan the per-keyword GETs out over a small thread pool: total wait
+    # drops from k round-trips to roughly one. map() preserves keyword
+    # order, so aggregation and the total cap behave like the old loop.
+    with ThreadPoolExecutor(max_workers=min(8, len(patterns))) as pool:
+        for hits in pool.map(_fetch, patterns):
+            for item in hits:
+                results.append(item)
+                if len(results) >= max_total_results:
+                    break
+            if len(results) >= max_total_results:
+                break
 
     log(f"automation_search_with_keywords(): collected {len(results)} total hits from automation server")
     return results
 
 
+def _emit_response(resp: Dict[str, Any]) -> None:
+    """Serialize the response once and push it to stdout in a single write."""
+    try:
+        body = _dumps(resp)
+    except Exception as ex:
+        # The stdlib parser accepts \uD8xx escapes, so a lone surrogate can
+        # survive all the way to serialization and fail UTF-8 encoding here.
+        # Scrub the tree and retry rather than emitting nothing.
+        log(f"_emit_response(): serialization failed ({ex!r}); sanitizing and retrying")
+        body = _dumps(sanitize_obj(resp))
+    sys.stdout.buffer.write(body)
+    sys.stdout.buffer.flush()
+
+
 def main() -> None:
     req = read_request()
     messages = req.get("Messages", []) or []
@@ -1011,7 +1871,9 @@ def main() -> None:
     log(f"main(): debug_mode={debug_mode}")
 
     last_user_raw = extract_last_user_message(messages)
-    if not last_user_raw:
+    # strip() also catches whitespace-only messages, which would otherwise
+    # burn a full LLM round-trip on an empty question.
+    if not last_user_raw.strip():
         resp = {
             "AssistantMessage": (
                 "I don't see any user message yet. "
@@ -1020,7 +1882,7 @@ def main() -> None:
             "SearchKeywords": [],
             "ExcludedModules": [],
         }
-        json.dump(resp, sys.stdout)
+        _emit_response(resp)
         return
 
     # In debug mode, bypass any Claude/OpenAI calls and just echo the
@@ -1033,7 +1895,7 @@ def main() -> None:
             "SearchKeywords": [last_user_raw],
             "ExcludedModules": [],
         }
-        json.dump(resp, sys.stdout)
+        _emit_response(resp)
         return
 
     FILE_ANALYZE_PREFIX = "[[FILE_ANALYZE]]"
@@ -1044,31 +1906,35 @@ def main() -> None:
         mode = "file"
         last_user = last_user[len(FILE_ANALYZE_PREFIX) :].lstrip()
 
+    # Warm up the Poe/OpenAI TLS connection while the overview is built;
+    # automation mode talks to the Claude CLI instead and skips it.
+    if mode != "automation":
+        threading.Thread(target=_prewarm_openai_connection, daemon=True).start()
+
     if mode == "file":
         overview = build_type_outline(project, last_user)
         if not overview:
             overview = build_project_overview(project)
         project_overview = overview
+    elif mode == "automation":
+        # Claude discovers modules and types itself through the automation
+        # server's search endpoints, so the module listing would be dead
+        # weight in the prompt file — skip building it and send only the
+        # server's reachability status.
+        project_overview = ping_automation_server()
     else:
         project_overview = build_project_overview(project)
 
-    if mode == "automation":
-        # Best-effort ping of the local automation server so that
-        # the model can be told whether it is available.
-        status_msg = ping_automation_server()
-        if project_overview:
-            project_overview = status_msg + "\n\n" + project_overview
-        else:
-            project_overview = status_msg
-
     # Try OpenAI/Claude for structured output; fall back to local keyword
     # extraction in non-automation modes. For automation, surface errors
     # directly to the user instead of silently using heuristics.
     try:
         resp = call_openai_structured(last_user, project_overview, mode=mode)
     except Exception as ex:
-        # Log full traceback to stderr so the host app can surface it.
+        # Log full traceback to stderr so the host app can surface it, and
+        # push buffered log lines to disk while the failure is fresh.
         traceback.print_exc()
+        flush_log()
         if mode == "automation":
             # In automation mode, do not use any offline heuristic. Return
             # a clear error message so the user understands what failed.
@@ -1133,7 +1999,8 @@ def main() -> None:
             # Never let automation enrichment break the core chat flow.
             log(f"main(): automation enrichment failed: {ex!r}")
 
-    json.dump(resp, sys.stdout)
+    _emit_response(resp)
+    flush_log()
 
 
 if __name__ == "__main__":
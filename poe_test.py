@@ -1,13 +1,22 @@
 import json
 import os
+import re
 
 import openai
 
+_FENCE_RE = re.compile(r"\A\s*```[^\n]*\n(.*?)\n?\s*```\s*\Z", re.DOTALL)
+
 
 def _strip_markdown_fence(text: str) -> str:
+    m = _FENCE_RE.match(text)
+    if m:
+        return m.group(1)
     text = text.strip()
     if not text.startswith("```"):
         return text
+    # Tolerant fallback for replies the anchored regex rejects: a truncated
+    # fence with no closing ``` or a fenced block followed by trailing
+    # prose. Drop the opening fence line, then cut at the last ``` if any.
     first_newline = text.find("\n")
     if first_newline != -1:
         text = text[first_newline + 1 :]